@@ -5,104 +5,324 @@ AI-powered resume generation with HuggingFace native models
 """
 
 import gradio as gr
+import atexit
+import copy
+import gc
 import json
+import os
+import threading
+import time
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
-import torch
-from resume_data import RESUME_DATABASE
-from utils import build_resume_json, extract_key_requirements, parse_resume_text, validate_json_resume
+from backends import count_new_tokens, load_backend, summary_generation_kwargs
+from batching import BucketedEncoder
+from experience_index import ExperienceIndex
+from memory import log_memory
+import profiling
+from querycache import CacheWarmer, LRUCache, QueryLog
+from resume_data import EXAMPLE_JOBS, RESUME_DATABASE
+from resume_store import ResumeStore, build_store_index
+from tenants import TenantStore
+from singleflight import SingleFlight
+from stagegraph import StageExecutor, StageGraph
+from tag_filters import TagTaxonomy, hard_requirements
+from utils import build_resume_json, extract_key_requirements, normalize_job_description, parse_resume_text, validate_json_resume
+
+# Low-memory mode: mmap'd safetensors weights and idle unloading of the generator
+LOW_MEMORY_MODE = os.getenv("LOW_MEMORY_MODE", "0").lower() in ("1", "true", "yes")
+GENERATOR_IDLE_SECONDS = float(os.getenv("GENERATOR_IDLE_SECONDS", "300"))
+
+# Encode in token-length buckets; texts past EMBED_MAX_TOKENS (default: the
+# model's max sequence length) are chunked and pooled instead of truncated
+EMBED_BUCKETING = os.getenv("EMBED_BUCKETING", "1").lower() in ("1", "true", "yes")
+EMBED_MAX_TOKENS = int(os.getenv("EMBED_MAX_TOKENS", "0"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "4096"))
+
+# Collapse near-duplicate work entries into canonical rows when building the index
+DEDUP_EXPERIENCES = os.getenv("DEDUP_EXPERIENCES", "0").lower() in ("1", "true", "yes")
+
+# Stop summary generation at the end of the first sentence (the only part kept);
+# SUMMARY_DECODING=greedy makes summaries deterministic
+SUMMARY_EARLY_STOP = os.getenv("SUMMARY_EARLY_STOP", "1").lower() in ("1", "true", "yes")
+SUMMARY_DECODING = os.getenv("SUMMARY_DECODING", "sample")  # "sample" or "greedy"
+
+# Rank each experience's highlights against the posting instead of taking them in source order
+HIGHLIGHT_INDEX = os.getenv("HIGHLIGHT_INDEX", "1").lower() in ("1", "true", "yes")
+HIGHLIGHTS_PER_EXPERIENCE = int(os.getenv("HIGHLIGHTS_PER_EXPERIENCE", "3"))
+
+# Treat taxonomy terms in clauses like "Docker expertise required" as must-haves
+REQUIREMENT_FILTERS = os.getenv("REQUIREMENT_FILTERS", "1").lower() in ("1", "true", "yes")
+_taxonomy = TagTaxonomy()
+
+# Compressed index mode: INDEX_DIMS > 0 or a non-float32 INDEX_DTYPE enables it
+INDEX_DIMS = int(os.getenv("INDEX_DIMS", "0"))
+INDEX_REDUCTION = os.getenv("INDEX_REDUCTION", "pca")  # "pca" or "truncate" (Matryoshka models)
+INDEX_DTYPE = os.getenv("INDEX_DTYPE", "float32")  # "float32", "float16" or "int8"
+INDEX_RERANK = int(os.getenv("INDEX_RERANK", "0"))  # full-precision rerank of this many candidates
+INDEX_RERANK_PATH = os.getenv("INDEX_RERANK_PATH")  # .npy file to memory-map rerank vectors from
 
 # Global model cache
 _models_cache = None
 
-# Global variable for the current resume database
-_current_resume_database = RESUME_DATABASE.copy()
+# Load time and memory of the embedding/generator backends (see backends.py)
+_backend_reports = {}
+
+# Serializes model (re)loading and idle unloading
+_models_lock = threading.Lock()
+_generator_last_used = 0.0
+_idle_reaper = None
+
+# Per-session resume databases: tenant index LRU bounds
+TENANT_INDEX_CACHE_SIZE = int(os.getenv("TENANT_INDEX_CACHE_SIZE", "256"))
+TENANT_INDEX_CACHE_MB = float(os.getenv("TENANT_INDEX_CACHE_MB", "256"))
+TENANT_MAX_SESSIONS = int(os.getenv("TENANT_MAX_SESSIONS", "10000"))
+
+# Disk-backed resumes (see resume_store.py); RESUME_DATABASE is used when unset
+RESUME_STORE = os.getenv("RESUME_STORE")
+_resume_store = ResumeStore(RESUME_STORE) if RESUME_STORE else None
+_base_database = _resume_store if _resume_store is not None else RESUME_DATABASE
+
+# Each session's replacements on top of the shared base database
+DEFAULT_TENANT = "default"
+_tenants = TenantStore(
+    _base_database,
+    max_indexes=TENANT_INDEX_CACHE_SIZE,
+    max_index_bytes=int(TENANT_INDEX_CACHE_MB * 1024 * 1024),
+    max_tenants=TENANT_MAX_SESSIONS
+)
+
+# Coalesce identical in-flight requests (same normalized job text and database)
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "1").lower() in ("1", "true", "yes")
+_inflight = SingleFlight()
+
+# Run retrieval and summary generation concurrently; torch stages are limited to
+# STAGE_TORCH_SLOTS at a time, which share the process's torch threads
+# (0: one per overlapping torch stage, at most one per thread)
+CONCURRENT_STAGES = os.getenv("CONCURRENT_STAGES", "1").lower() in ("1", "true", "yes")
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "4"))
+STAGE_TORCH_SLOTS = int(os.getenv("STAGE_TORCH_SLOTS", "0"))
+_stage_executor = StageExecutor(max_workers=STAGE_WORKERS, torch_slots=STAGE_TORCH_SLOTS)
+
+# Query caches, the rolling query log and startup cache warming
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))  # entries per cache, 0 disables
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "")  # file to persist the log to; unset keeps it in memory only
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "50"))
+WARM_BUDGET_SECONDS = float(os.getenv("WARM_BUDGET_SECONDS", "120"))
+WARM_DUTY_CYCLE = float(os.getenv("WARM_DUTY_CYCLE", "0.5"))
+
+_embedding_cache = LRUCache(QUERY_CACHE_SIZE)
+_search_cache = LRUCache(QUERY_CACHE_SIZE)
+_summary_cache = LRUCache(QUERY_CACHE_SIZE)
+_query_log = QueryLog(QUERY_LOG_PATH or None)
+atexit.register(_query_log.flush)
+_warmer = None
+
+# Requests being served right now; the background warmer waits while any are
+_live_requests = 0
+_live_lock = threading.Lock()
+
+# Experience index over the shared base database, reused by every tenant
+_experience_index = None
+_index_lock = threading.Lock()
+
+def load_embedding_model():
+    """Load the configured embedding backend (sentence-transformers by default)"""
+    
+    model, report = load_backend("embedding")
+    _record_backend(report)
+    if EMBED_BUCKETING:
+        model = BucketedEncoder(model, max_tokens=EMBED_MAX_TOKENS or None, batch_tokens=EMBED_BATCH_TOKENS)
+    return model
+
+def load_generator():
+    """Load the configured generator backend (GPT-2 by default)"""
+    
+    generator, report = load_backend("generator")
+    _record_backend(report)
+    return generator
+
+def _record_backend(report):
+    _backend_reports[report["kind"]] = report
+    print(f"📦 {report['kind']} backend '{report['backend']}': {report['load_seconds']}s, "
+          f"+{report['rss_delta_mb']} MB RSS, {report['param_mb']} MB parameters")
+
+def backend_reports():
+    """Return the load report of each backend loaded so far"""
+    
+    return dict(_backend_reports)
+
+def _generator_model_name():
+    report = _backend_reports.get("generator", {"backend": "gpt2", "model": "gpt2"})
+    return "template" if report["backend"] == "template" else f"HuggingFace/{report['model']}"
 
 def load_models():
     """Load and cache HuggingFace models"""
+    global _models_cache, _generator_last_used
+    
+    with _models_lock:
+        _generator_last_used = time.monotonic()
+        
+        if _models_cache is not None and _models_cache[1] is not None:
+            return _models_cache
+        
+        if _models_cache is None:
+            print("🔄 Loading AI models...")
+            
+            # Embedding model for similarity search
+            embedding_model = load_embedding_model()
+        else:
+            print("🔄 Reloading generator after idle unload...")
+            embedding_model = _models_cache[0]
+        
+        # Text generation model for resume content
+        generator = load_generator()
+        
+        _models_cache = (embedding_model, generator)
+        print("✅ Models loaded successfully!")
+        log_memory("models loaded")
+        
+        if LOW_MEMORY_MODE:
+            _start_idle_reaper()
+    
+    return _models_cache
+
+def unload_generator():
+    """Drop the cached generator so its weights can be released"""
     global _models_cache
     
-    if _models_cache is not None:
-        return _models_cache
+    with _models_lock:
+        if _models_cache is None or _models_cache[1] is None:
+            return False
+        
+        # Requests already holding the generator keep it alive until they finish
+        _models_cache = (_models_cache[0], None)
     
-    print("🔄 Loading AI models...")
+    gc.collect()
+    print(f"💤 Generator unloaded after {GENERATOR_IDLE_SECONDS:.0f}s idle")
+    log_memory("generator unloaded")
+    return True
+
+def _idle_reaper_loop():
+    """Unload the generator once it has been idle for GENERATOR_IDLE_SECONDS"""
     
-    # Embedding model for similarity search
-    embedding_model = SentenceTransformer('BAAI/bge-small-en-v1.5')
+    interval = max(1.0, min(GENERATOR_IDLE_SECONDS / 4, 30.0))
+    while True:
+        time.sleep(interval)
+        if time.monotonic() - _generator_last_used >= GENERATOR_IDLE_SECONDS:
+            unload_generator()
+
+def _start_idle_reaper():
+    """Start the idle reaper thread once (caller holds _models_lock)"""
+    global _idle_reaper
     
-    # Text generation model for resume content
-    generator = pipeline(
-        "text-generation",
-        model="gpt2",
-        device=0 if torch.cuda.is_available() else -1,
-        do_sample=True,
-        temperature=0.7,
-        max_new_tokens=100,
-        pad_token_id=50256
-    )
+    if _idle_reaper is None:
+        _idle_reaper = threading.Thread(target=_idle_reaper_loop, name="generator-idle-reaper", daemon=True)
+        _idle_reaper.start()
+
+def get_experience_index(embedding_model, tenant_id=None):
+    """Return the experience index a tenant searches, building indexes on first use"""
+    global _experience_index
     
-    _models_cache = (embedding_model, generator)
-    print("✅ Models loaded successfully!")
+    with _index_lock:
+        if _experience_index is None:
+            if _resume_store is not None:
+                # Rows stay on disk; only the embeddings are loaded (or memory-mapped from cache)
+                if DEDUP_EXPERIENCES:
+                    print("⚠️ DEDUP_EXPERIENCES is not supported with RESUME_STORE, skipping")
+                report = _backend_reports.get("embedding", {})
+                cache_key = "-".join(part for part in (report.get("backend"), report.get("model")) if part)
+                if getattr(embedding_model, "cache_tag", ""):
+                    # Chunked long texts embed differently, so they get their own cache
+                    cache_key += f"-{embedding_model.cache_tag}"
+                _experience_index = build_store_index(_resume_store, embedding_model, highlights=HIGHLIGHT_INDEX,
+                                                      cache_key=cache_key,
+                                                      tags=REQUIREMENT_FILTERS)
+            else:
+                _experience_index = ExperienceIndex.build(RESUME_DATABASE, embedding_model, dedup=DEDUP_EXPERIENCES,
+                                                          highlights=HIGHLIGHT_INDEX, tags=REQUIREMENT_FILTERS)
+            if _experience_index.dedup_stats:
+                stats = _experience_index.dedup_stats
+                print(f"🧹 Deduplicated experiences: {stats['rows_before']} -> {stats['rows_after']} rows")
+            if INDEX_DIMS or INDEX_DTYPE != "float32":
+                full_bytes = _experience_index.nbytes
+                _experience_index.compress(INDEX_DIMS, INDEX_REDUCTION, INDEX_DTYPE, INDEX_RERANK, INDEX_RERANK_PATH)
+                print(f"🗜️ Compressed experience index: {full_bytes} -> {_experience_index.nbytes} bytes")
+        base_index = _experience_index
     
-    return _models_cache
+    return _tenants.index(tenant_id, base_index, embedding_model)
 
-def find_relevant_experience(job_description, embedding_model, top_k=5):
+def find_relevant_experience(job_description, embedding_model, top_k=5, tenant_id=None):
     """Find most relevant resume experiences using semantic search"""
     
-    # Use the global current resume database
-    database = _current_resume_database
+    # Results are cached per normalized query, requirement filter and tenant database version
+    tag_filter = requirement_filter(job_description)
+    query = normalize_job_description(job_description)
+    version = _tenants.version(tenant_id)
+    search_key = (query, tag_filter.key() if tag_filter else None, top_k, tenant_id if version else None, version)
+    cached = _search_cache.get(search_key)
+    if cached is not None:
+        return list(cached)
+    
+    # Experience embeddings are computed once per tenant database version
+    with profiling.stage("index"):
+        index = get_experience_index(embedding_model, tenant_id)
     
     # Get job description embedding
-    job_embedding = embedding_model.encode([job_description])
-    
-    # Get all experience embeddings
-    experiences = []
-    embeddings = []
-    
-    for person in database:
-        for exp in person.get('work', []):
-            experiences.append({
-                'person': person['basics']['name'],
-                'company': exp.get('name', ''),
-                'position': exp.get('position', ''),
-                'summary': exp.get('summary', ''),
-                'highlights': exp.get('highlights', []),
-                'skills': person.get('skills', [])
-            })
-            
-            # Create searchable text
-            searchable_text = f"{exp.get('position', '')} {exp.get('summary', '')} {' '.join(exp.get('highlights', []))}"
-            embeddings.append(embedding_model.encode([searchable_text])[0])
-    
-    # Calculate similarities
-    if embeddings:
-        embeddings_matrix = np.vstack(embeddings)
-        similarities = np.dot(job_embedding, embeddings_matrix.T)[0]
-        
-        # Get top experiences
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        return [experiences[i] for i in top_indices]
+    with profiling.stage("encode"):
+        job_embedding = _embedding_cache.get(query)
+        if job_embedding is None:
+            job_embedding = embedding_model.encode([job_description])[0]
+            _embedding_cache.put(query, job_embedding)
     
-    return []
+    with profiling.stage("search"):
+        highlights_per_row = HIGHLIGHTS_PER_EXPERIENCE if HIGHLIGHT_INDEX else 0
+        # Hard requirements restrict the candidates before scoring; if too few
+        # experiences qualify the best of the rest fill in
+        results = index.search(job_embedding, top_k=top_k, highlights_per_row=highlights_per_row, tag_filter=tag_filter)
+        if tag_filter and len(results) < top_k:
+            seen = {(exp['person'], exp['company'], exp['position']) for exp in results}
+            for exp in index.search(job_embedding, top_k=top_k * 2, highlights_per_row=highlights_per_row):
+                if len(results) < top_k and (exp['person'], exp['company'], exp['position']) not in seen:
+                    results.append(exp)
+    _search_cache.put(search_key, results)
+    return list(results)
 
-def generate_resume_content(job_description, relevant_experiences, generator, user_resume=None):
-    """Generate tailored resume content using HuggingFace models"""
+def requirement_filter(job_description):
+    """Return the hard requirements ("Kubernetes required") of a posting, or None when disabled
     
-    # Extract key requirements from job description
-    requirements = extract_key_requirements(job_description)
+    They are read from the raw text: its line breaks end clauses, and
+    normalization would merge them.
+    """
+    
+    return hard_requirements(job_description, _taxonomy) if REQUIREMENT_FILTERS else None
+
+def analyze_requirements(job_description):
+    """Extract key requirements from a job description"""
+    
+    with profiling.stage("requirements"):
+        return extract_key_requirements(job_description)
+
+def generate_resume_content(job_description, relevant_experiences, generator, user_resume=None, summary=None):
+    """Generate tailored resume content using HuggingFace models
+    
+    summary skips generation when the professional summary was already
+    produced, e.g. concurrently with retrieval.
+    """
+    
+    if summary is None:
+        requirements = analyze_requirements(job_description)
+        summary = generate_professional_summary(job_description, requirements, generator)
     
     # Use user resume basics if provided
     if user_resume and user_resume.get('basics'):
         basics = user_resume['basics'].copy()
-        basics['summary'] = generate_professional_summary(job_description, requirements, generator)
+        basics['summary'] = summary
     else:
         basics = {
             "name": "AI-Generated Candidate",
             "email": "candidate@example.com", 
             "phone": "+1-555-0123",
-            "summary": generate_professional_summary(job_description, requirements, generator)
+            "summary": summary
         }
     
     # Build base resume structure
@@ -110,7 +330,7 @@ def generate_resume_content(job_description, relevant_experiences, generator, us
         "$schema": "https://raw.githubusercontent.com/jsonresume/resume-schema/v1.0.0/schema.json",
         "_metadata": {
             "generated_at": datetime.now().strftime("%Y%m%d-%H%M%S"),
-            "model": "HuggingFace/gpt2",
+            "model": _generator_model_name(),
             "source": "Deep Job Seek Mini"
         },
         "basics": basics,
@@ -126,7 +346,7 @@ def generate_resume_content(job_description, relevant_experiences, generator, us
             "name": exp['company'],
             "position": exp['position'],
             "summary": exp['summary'],
-            "highlights": exp['highlights'][:3],  # Top 3 highlights
+            "highlights": exp['highlights'][:HIGHLIGHTS_PER_EXPERIENCE],  # Most relevant highlights first
             "startDate": "2020-01-01",  # Placeholder
             "endDate": "2023-12-31" if i == 0 else "2020-12-31"
         }
@@ -146,13 +366,23 @@ def generate_resume_content(job_description, relevant_experiences, generator, us
 def generate_professional_summary(job_description, requirements, generator):
     """Generate a professional summary using HuggingFace model"""
     
+    cache_key = normalize_job_description(job_description)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Create a prompt for summary generation
     prompt = f"Professional summary for a candidate applying to: {job_description[:200]}... Key requirements: {', '.join(requirements[:5])}. Summary:"
     
     try:
         # Generate summary
-        result = generator(prompt, max_new_tokens=50, num_return_sequences=1, truncation=True)
+        with profiling.stage("generate"):
+            result = generator(prompt, max_new_tokens=50, num_return_sequences=1, truncation=True,
+                               **summary_generation_kwargs(generator, SUMMARY_EARLY_STOP, SUMMARY_DECODING))
         generated_text = result[0]['generated_text']
+        if profiling.recording():
+            # Re-tokenizes the output, so only when the request is being recorded
+            profiling.count("summary_tokens", count_new_tokens(generator, prompt, generated_text))
         
         # Extract just the summary part
         if "Summary:" in generated_text:
@@ -162,27 +392,133 @@ def generate_professional_summary(job_description, requirements, generator):
             
         # Clean up and limit length
         summary = summary.split('.')[0] + '.' if '.' in summary else summary
-        return summary[:200] if len(summary) > 200 else summary
+        summary = summary[:200] if len(summary) > 200 else summary
+        _summary_cache.put(cache_key, summary)
+        return summary
         
     except Exception as e:
         # Fallback summary
         return f"Experienced professional with expertise in {', '.join(requirements[:3])} seeking to contribute to innovative projects and drive business success."
 
-def generate_resume(job_description, progress=gr.Progress()):
+def _run_pipeline(job_description, progress, profile, tenant_id):
+    """Run the embedding, search and generation pipeline for one job description"""
+    
+    with profiling.profile_request("generate_resume", force=profile):
+        progress(0.1, desc="Loading AI models...")
+        with profiling.stage("load_models"):
+            embedding_model, generator = load_models()
+        
+        # Retrieval and the summary only share the job description, so they
+        # run side by side; the resume is assembled once both are done
+        progress(0.3, desc="Analyzing job requirements and generating summary...")
+        graph = StageGraph()
+        graph.add("retrieve", lambda: find_relevant_experience(job_description, embedding_model, tenant_id=tenant_id),
+                  uses_torch=True)
+        graph.add("analyze", lambda: analyze_requirements(job_description))
+        graph.add("summarize", lambda requirements: generate_professional_summary(job_description, requirements, generator),
+                  deps=["analyze"], uses_torch=True)
+        graph.add("assemble", lambda experiences, summary: generate_resume_content(
+            job_description, experiences, generator, summary=summary), deps=["retrieve", "summarize"])
+        
+        # cProfile would miss stages on pool threads, so cProfiled requests run them here
+        concurrent = CONCURRENT_STAGES and not profiling.cprofile_active()
+        run = graph.run(_stage_executor if concurrent else None)
+        profiling.record_graph(run)
+        return run.results["assemble"]
+
+def build_tailored_resume(job_description, progress=None, profile=False, tenant_id=None, record_query=True):
+    """Run the resume pipeline for a job description and return the resume dict
+    
+    record_query=False keeps synthetic traffic (load tests, bulk exports) out of
+    the query log that drives cache warming.
+    """
+    
+    global _live_requests
+    
+    if progress is None:
+        progress = lambda *args, **kwargs: None
+    
+    if record_query:
+        _query_log.record(job_description)
+    with _live_lock:
+        _live_requests += 1
+    try:
+        # A profiled request could join a leader that isn't profiled, so it runs on its own
+        if not SINGLE_FLIGHT or profile:
+            return _run_pipeline(job_description, progress, profile, tenant_id)
+        
+        # Tenants that haven't changed their resumes share the base database, and
+        # postings that normalize alike but have different must-haves don't coalesce
+        version = _tenants.version(tenant_id)
+        tag_filter = requirement_filter(job_description)
+        key = (normalize_job_description(job_description), tag_filter.key() if tag_filter else None,
+               tenant_id if version else None, version)
+        
+        resume, shared = _inflight.do(
+            key, _run_pipeline, job_description, progress, profile, tenant_id,
+            on_wait=lambda: progress(0.3, desc="Waiting for an identical request...")
+        )
+        # Every caller gets its own copy of a shared result
+        return copy.deepcopy(resume) if shared else resume
+    finally:
+        with _live_lock:
+            _live_requests -= 1
+
+def warm_query(job_description):
+    """Fill the embedding, search and summary caches for one job description"""
+    
+    embedding_model, generator = load_models()
+    find_relevant_experience(job_description, embedding_model)
+    generate_professional_summary(job_description, analyze_requirements(job_description), generator)
+
+def start_cache_warmer(background=True):
+    """Warm the caches for the UI examples and the hottest logged queries
+    
+    In the background the warmer yields to live requests and keeps to
+    WARM_DUTY_CYCLE; in the foreground (before serving) it runs flat out.
+    Both stop after WARM_BUDGET_SECONDS.
+    """
+    global _warmer
+    
+    jobs = {}
+    for job in EXAMPLE_JOBS + _query_log.top(WARM_TOP_N):
+        jobs.setdefault(normalize_job_description(job), job)
+    
+    _warmer = CacheWarmer(
+        warm_query, list(jobs.values()), budget_seconds=WARM_BUDGET_SECONDS,
+        duty_cycle=WARM_DUTY_CYCLE if background else 1.0, is_busy=lambda: _live_requests > 0
+    )
+    if background:
+        _warmer.start()
+    else:
+        _warmer.run()
+    return _warmer
+
+def cache_stats():
+    """Return hit/miss counters for the query caches and the warmer's progress"""
+    
+    return {
+        "embedding": _embedding_cache.stats(),
+        "search": _search_cache.stats(),
+        "summary": _summary_cache.stats(),
+        "logged_queries": len(_query_log),
+        "warmer": dict(_warmer.stats) if _warmer else None
+    }
+
+def single_flight_stats():
+    """Return how many requests led a computation and how many were coalesced"""
+    
+    return _inflight.stats()
+
+def generate_resume(job_description, request: gr.Request = None, progress=gr.Progress()):
     """Main function to generate tailored resume"""
     
     if not job_description.strip():
         return None, "Please enter a job description."
     
     try:
-        progress(0.1, desc="Loading AI models...")
-        embedding_model, generator = load_models()
-        
-        progress(0.3, desc="Analyzing job requirements...")
-        relevant_experiences = find_relevant_experience(job_description, embedding_model)
-        
-        progress(0.6, desc="Generating tailored resume...")
-        resume = generate_resume_content(job_description, relevant_experiences, generator)
+        profile = profiling.header_requests_profile(request.headers if request else None)
+        resume = build_tailored_resume(job_description, progress, profile=profile, tenant_id=session_tenant_id(request))
         
         progress(0.9, desc="Finalizing resume...")
         
@@ -191,15 +527,22 @@ def generate_resume(job_description, progress=gr.Progress()):
         
         progress(1.0, desc="Complete!")
         
+        if LOW_MEMORY_MODE:
+            log_memory("request complete")
+        
         return resume_json, "✅ Resume generated successfully!"
         
     except Exception as e:
         return None, f"❌ Error generating resume: {str(e)}"
 
-def handle_resume_update(original_resume_text):
-    """Handle updating the original resume in the database"""
+def session_tenant_id(request):
+    """Return the tenant a Gradio request belongs to (its browser session)"""
+    
+    return getattr(request, "session_hash", None) or DEFAULT_TENANT
+
+def handle_resume_update(original_resume_text, request: gr.Request = None):
+    """Handle updating the original resume in this session's database"""
     print(f"handle_resume_update called with text length: {len(original_resume_text)}")
-    global _current_resume_database
 
     if not original_resume_text.strip():
         print("Original resume text is empty.")
@@ -215,9 +558,9 @@ def handle_resume_update(original_resume_text):
             print("Invalid resume format detected.")
             return "", "❌ Invalid resume format. Please ensure it's a valid JSON Resume or well-structured text/markdown." # Clear output and show error
 
-        # If valid, replace the first entry in the database with the new resume
+        # If valid, replace the first entry in this session's database with the new resume
         # For simplicity, we'll replace the first entry. In a real app, you might add/merge.
-        _current_resume_database[0] = parsed_resume
+        _tenants.replace_resume(session_tenant_id(request), 0, parsed_resume)
         print("Original resume updated successfully in database.")
         return json.dumps(parsed_resume, indent=2), "✅ Original resume updated successfully!"
 
@@ -302,14 +645,8 @@ def create_interface():
         # Examples
         gr.Markdown("## 💡 Example Job Descriptions")
         
-        example_jobs = [
-            "Senior Python Developer with Flask experience, 5+ years building REST APIs, Docker expertise required",
-            "DevOps Engineer specializing in AWS, Kubernetes, and CI/CD pipelines with 3+ years experience",
-            "Full-Stack Developer proficient in React, Node.js, and PostgreSQL for e-commerce applications"
-        ]
-        
         gr.Examples(
-            examples=[[job] for job in example_jobs],
+            examples=[[job] for job in EXAMPLE_JOBS],
             inputs=[job_input],
             label="Click an example to try:"
         )
@@ -349,6 +686,8 @@ def create_interface():
 
 if __name__ == "__main__":
     demo = create_interface()
+    if WARM_ON_STARTUP:
+        start_cache_warmer()
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Pluggable model backends for Deep Job Seek Mini
+
+Embedding backends expose encode(texts) -> np.ndarray; generator backends are
+called like a transformers text-generation pipeline and return
+[{"generated_text": ...}]. The backends in use are chosen by environment
+variables or a JSON config file:
+
+    EMBEDDING_BACKEND=hashing GENERATOR_BACKEND=template python app.py
+    MODEL_CONFIG=models.json python app.py
+
+    {"embedding": {"backend": "sentence-transformers", "model": "BAAI/bge-small-en-v1.5"},
+     "generator": {"backend": "distilgpt2"}}
+
+Every load is measured (seconds, RSS growth, parameter bytes) so backends can
+be compared with `python backends.py --report`.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import weakref
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from memory import current_rss_mb
+from resume_data import EXAMPLE_JOBS
+
+DEFAULT_EMBEDDING_BACKEND = "sentence-transformers"
+DEFAULT_GENERATOR_BACKEND = "gpt2"
+
+EMBEDDING_BACKENDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+GENERATOR_BACKENDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+def register_embedding_backend(name: str, default_model: Optional[str] = None):
+    """Register a factory taking an options dict and returning an embedding model
+
+    default_model is passed as options["model"] when the config names none.
+    """
+
+    def decorator(factory):
+        factory.default_model = default_model
+        EMBEDDING_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+def register_generator_backend(name: str, default_model: Optional[str] = None):
+    """Register a factory taking an options dict and returning a generator
+
+    default_model is passed as options["model"] when the config names none.
+    """
+
+    def decorator(factory):
+        factory.default_model = default_model
+        GENERATOR_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+class HashingEmbedder:
+    """Offline stand-in for the sentence transformer: hashed bag of words"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.dim] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+class TemplateGenerator:
+    """Offline stand-in for GPT-2 that fills a summary template from the prompt
+
+    latency_ms simulates generation time for load tests.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+
+    def __call__(self, prompt, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        match = re.search(r"Key requirements: (.*?)\. Summary:", prompt)
+        skills = [skill.strip() for skill in match.group(1).split(",") if skill.strip()] if match else []
+        expertise = ", ".join(skills[:3]) or "software engineering"
+        return [{"generated_text": f"{prompt} Experienced professional with proven expertise in {expertise}."}]
+
+@register_embedding_backend("sentence-transformers", default_model="BAAI/bge-small-en-v1.5")
+def _sentence_transformer(options):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(
+        options["model"],
+        model_kwargs={"use_safetensors": True, "low_cpu_mem_usage": True}
+    )
+
+@register_embedding_backend("hashing")
+def _hashing(options):
+    return HashingEmbedder(int(options.get("dim", 384)))
+
+def _causal_lm_pipeline(model_name: str, options):
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+
+    # safetensors files are memory-mapped, so weights are paged in from the
+    # file instead of being copied through a temporary state dict
+    model = AutoModelForCausalLM.from_pretrained(model_name, use_safetensors=True, low_cpu_mem_usage=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        device=0 if torch.cuda.is_available() else -1,
+        do_sample=True,
+        temperature=0.7,
+        max_new_tokens=100,
+        pad_token_id=tokenizer.eos_token_id
+    )
+
+@register_generator_backend("gpt2", default_model="gpt2")
+def _gpt2(options):
+    return _causal_lm_pipeline(options["model"], options)
+
+@register_generator_backend("distilgpt2", default_model="distilgpt2")
+def _distilgpt2(options):
+    return _causal_lm_pipeline(options["model"], options)
+
+@register_generator_backend("template")
+def _template(options):
+    return TemplateGenerator(float(options.get("latency_ms", 0.0)))
+
+# generator -> stopping criteria; entries go away with the generator, so an
+# idle-unloaded model (LOW_MEMORY_MODE) doesn't leave its lookup table behind
+_sentence_stops = weakref.WeakKeyDictionary()
+
+def first_sentence_stopping(generator):
+    """Return stopping criteria ending generation once a token containing '.' is produced
+
+    Summaries are cut at their first period anyway, so tokens after it are
+    wasted work. Returns None for generators without a tokenizer (template).
+    """
+
+    tokenizer = getattr(generator, "tokenizer", None)
+    if tokenizer is None:
+        return None
+    stopping = _sentence_stops.get(generator)
+    if stopping is None:
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        class FirstSentenceStop(StoppingCriteria):
+            def __init__(self, is_stop):
+                self.is_stop = is_stop
+
+            def __call__(self, input_ids, scores, **kwargs):
+                # One flag per sequence (transformers>=4.39)
+                if self.is_stop.device != input_ids.device:
+                    self.is_stop = self.is_stop.to(input_ids.device)
+                return self.is_stop[input_ids[:, -1]]
+
+        # The model can emit ids past the tokenizer's vocabulary when its
+        # embedding matrix is padded, so size the table for both
+        config = getattr(getattr(generator, "model", None), "config", None)
+        is_stop = torch.zeros(max(len(tokenizer), getattr(config, "vocab_size", 0) or 0), dtype=torch.bool)
+        # One pass over the vocabulary, done once per generator
+        is_stop[[i for i in range(len(tokenizer)) if "." in tokenizer.decode([i])]] = True
+        stopping = StoppingCriteriaList([FirstSentenceStop(is_stop)])
+        _sentence_stops[generator] = stopping
+    return stopping
+
+def summary_generation_kwargs(generator, early_stop: bool = True, decoding: str = "sample") -> Dict[str, Any]:
+    """Extra generator arguments for summaries: first-sentence stopping and greedy decoding"""
+
+    kwargs = {}
+    if early_stop:
+        stopping = first_sentence_stopping(generator)
+        if stopping is not None:
+            kwargs["stopping_criteria"] = stopping
+    if decoding == "greedy":
+        # Deterministic output: the same prompt always gives the same summary
+        kwargs.update(do_sample=False, temperature=None)
+    return kwargs
+
+def count_new_tokens(generator, prompt: str, generated_text: str) -> int:
+    """Number of tokens generated after the prompt (0 for generators without a tokenizer)"""
+
+    tokenizer = getattr(generator, "tokenizer", None)
+    if tokenizer is None:
+        return 0
+    continuation = generated_text[len(prompt):] if generated_text.startswith(prompt) else generated_text
+    return len(tokenizer(continuation)["input_ids"])
+
+def resolve_config(kind: str) -> Tuple[str, Dict[str, Any]]:
+    """Return (backend name, options) for "embedding" or "generator"
+
+    Environment variables (EMBEDDING_BACKEND / GENERATOR_BACKEND, plus JSON
+    EMBEDDING_OPTIONS / GENERATOR_OPTIONS) override the MODEL_CONFIG file.
+    """
+
+    config = {}
+    config_path = os.getenv("MODEL_CONFIG")
+    if config_path:
+        with open(config_path) as f:
+            config = json.load(f).get(kind, {})
+
+    options = {key: value for key, value in config.items() if key != "backend"}
+    options.update(json.loads(os.getenv(f"{kind.upper()}_OPTIONS", "{}")))
+
+    default = DEFAULT_EMBEDDING_BACKEND if kind == "embedding" else DEFAULT_GENERATOR_BACKEND
+    name = os.getenv(f"{kind.upper()}_BACKEND") or config.get("backend") or default
+    return name, options
+
+def load_backend(kind: str, name: str = None, options: Dict[str, Any] = None):
+    """Load a backend and return (model, report) with its load time and memory"""
+
+    registry = EMBEDDING_BACKENDS if kind == "embedding" else GENERATOR_BACKENDS
+    # Configured options apply whenever the configured backend is loaded
+    configured_name, configured = resolve_config(kind)
+    if name is None or name == configured_name:
+        name = configured_name
+        options = {**configured, **(options or {})}
+    options = options or {}
+    if name not in registry:
+        raise ValueError(f"Unknown {kind} backend '{name}', expected one of: {', '.join(sorted(registry))}")
+    factory = registry[name]
+    if factory.default_model is not None:
+        options = {"model": factory.default_model, **options}
+
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    model = factory(options)
+    report = {
+        "kind": kind,
+        "backend": name,
+        # The model id actually loaded; None for backends without weights (hashing, template)
+        "model": options.get("model"),
+        "load_seconds": round(time.perf_counter() - started, 3),
+        "rss_delta_mb": round(current_rss_mb() - rss_before, 1),
+        "param_mb": round(_parameter_bytes(model) / (1024 * 1024), 1)
+    }
+    return model, report
+
+def _parameter_bytes(model) -> int:
+    """Bytes of torch parameters behind a SentenceTransformer or pipeline, if any"""
+
+    module = getattr(model, "model", model)
+    parameters = getattr(module, "parameters", None)
+    if not callable(parameters):
+        return 0
+    return sum(p.numel() * p.element_size() for p in parameters())
+
+def probe_latency_ms(kind: str, model, runs: int = 5) -> float:
+    """Median latency of one encode or one summary-sized generation"""
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        if kind == "embedding":
+            model.encode([EXAMPLE_JOBS[0]])
+        else:
+            model(f"Professional summary for a candidate applying to: {EXAMPLE_JOBS[0]}... Key requirements: Python, Flask. Summary:",
+                  max_new_tokens=50, num_return_sequences=1, truncation=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(timings)), 2)
+
+SUMMARY_MODES = {
+    "sample": {"early_stop": False, "decoding": "sample"},
+    "sample+stop": {"early_stop": True, "decoding": "sample"},
+    "greedy+stop": {"early_stop": True, "decoding": "greedy"}
+}
+
+def summary_benchmark(generator_name: str = DEFAULT_GENERATOR_BACKEND, runs: int = 10):
+    """Report summary latency and generated tokens for each decoding mode"""
+
+    generator, _ = load_backend("generator", generator_name)
+
+    print(f"{'mode':<14} {'p50 ms':>9} {'mean ms':>9} {'tokens/request':>15}")
+    for mode, options in SUMMARY_MODES.items():
+        kwargs = summary_generation_kwargs(generator, **options)
+        timings, tokens = [], []
+        for run in range(runs):
+            prompt = f"Professional summary for a candidate applying to: {EXAMPLE_JOBS[run % len(EXAMPLE_JOBS)]}... Summary:"
+            started = time.perf_counter()
+            text = generator(prompt, max_new_tokens=50, num_return_sequences=1, truncation=True, **kwargs)[0]["generated_text"]
+            timings.append((time.perf_counter() - started) * 1000)
+            tokens.append(count_new_tokens(generator, prompt, text))
+        print(f"{mode:<14} {np.median(timings):>9.1f} {np.mean(timings):>9.1f} {np.mean(tokens):>15.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Model backend registry")
+    parser.add_argument("--report", action="store_true", help="Load backends and report load time, memory and latency")
+    parser.add_argument("--embedding", default=",".join(sorted(EMBEDDING_BACKENDS)))
+    parser.add_argument("--generator", default=",".join(sorted(GENERATOR_BACKENDS)))
+    parser.add_argument("--runs", type=int, default=5, help="Latency probe runs per backend")
+    parser.add_argument("--summary-bench", action="store_true",
+                        help="Compare summary latency and tokens with and without early stopping / greedy decoding")
+    args = parser.parse_args()
+
+    if args.summary_bench:
+        for name in filter(None, args.generator.split(",")):
+            print(f"\n{name}:")
+            summary_benchmark(name, args.runs)
+        return
+
+    if not args.report:
+        print(f"Embedding backends: {', '.join(sorted(EMBEDDING_BACKENDS))}")
+        print(f"Generator backends: {', '.join(sorted(GENERATOR_BACKENDS))}")
+        return
+
+    print(f"{'kind':<10} {'backend':<22} {'load s':>8} {'RSS +MB':>8} {'params MB':>10} {'p50 ms':>8}")
+    for kind, names in (("embedding", args.embedding), ("generator", args.generator)):
+        for name in filter(None, names.split(",")):
+            try:
+                model, report = load_backend(kind, name)
+                latency = probe_latency_ms(kind, model, args.runs)
+            except Exception as e:
+                print(f"{kind:<10} {name:<22} failed: {e}")
+                continue
+            print(f"{kind:<10} {name:<22} {report['load_seconds']:>8} {report['rss_delta_mb']:>8} "
+                  f"{report['param_mb']:>10} {latency:>8}")
+            del model
+
+if __name__ == "__main__":
+    main()
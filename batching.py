@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Length-bucketed batching and chunked embedding for Deep Job Seek Mini
+
+Job descriptions and resume text range from one line to several pages.
+Encoding them in arbitrary batches pads every text to the longest one in its
+batch, and the embedding model silently truncates anything past its maximum
+sequence length. BucketedEncoder wraps an embedding model so that:
+
+- texts longer than max_tokens are split into overlapping token windows
+- all chunks are sorted by token length and grouped into batches under a
+  token budget (many short texts per batch, few long ones)
+- chunk vectors are pooled back into one vector per text, weighted by token
+  count (and re-normalized when the model returns unit vectors)
+
+    python batching.py --bench --model BAAI/bge-small-en-v1.5 --texts 2000
+"""
+
+import argparse
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\S+")
+
+class BucketedEncoder:
+    """Embedding model wrapper with token-length buckets and chunk pooling
+
+    max_tokens defaults to the model's max_seq_length (minus special tokens);
+    models without one (the hashing backend) are never chunked. Token counts
+    come from the model's fast tokenizer, or whitespace words without one.
+    """
+
+    def __init__(self, model, max_tokens: Optional[int] = None, batch_tokens: int = 4096,
+                 max_batch: int = 128, overlap: int = 32):
+        self.model = model
+        self.tokenizer = getattr(model, "tokenizer", None)
+        if not getattr(self.tokenizer, "is_fast", False):
+            self.tokenizer = None
+
+        special = self.tokenizer.num_special_tokens_to_add() if self.tokenizer is not None else 0
+        if not max_tokens:
+            max_seq_length = getattr(model, "max_seq_length", None)
+            max_tokens = max_seq_length - special if max_seq_length else None
+        self.max_tokens = max_tokens
+        self.batch_tokens = batch_tokens
+        self.max_batch = max_batch
+        self.overlap = min(overlap, max_tokens // 2) if max_tokens else 0
+        self.stats = {"texts": 0, "chunked_texts": 0, "chunks": 0, "batches": 0, "tokens": 0, "padded_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Everything else (max_seq_length, device, ...) is the wrapped model's
+        return getattr(self.model, name)
+
+    @property
+    def cache_tag(self) -> str:
+        """Suffix for embedding cache keys, since chunking changes long-text vectors"""
+
+        return f"chunk{self.max_tokens}" if self.max_tokens else ""
+
+    def _token_spans(self, texts: Sequence[str]) -> List[List[Tuple[int, int]]]:
+        # Character span of every token, so chunks can be cut from the original text
+        if self.tokenizer is None:
+            return [[match.span() for match in _WORD.finditer(text)] for text in texts]
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, return_offsets_mapping=True,
+                                 return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        return [list(map(tuple, offsets)) for offsets in encoded["offset_mapping"]]
+
+    def chunk(self, texts: Sequence[str]) -> Tuple[List[str], List[int], List[int]]:
+        """Split texts into chunks of at most max_tokens
+
+        Returns (chunk texts, source text of each chunk, token count of each chunk).
+        """
+
+        chunks, owners, lengths = [], [], []
+        for i, (text, spans) in enumerate(zip(texts, self._token_spans(texts))):
+            if not self.max_tokens or len(spans) <= self.max_tokens:
+                chunks.append(text)
+                owners.append(i)
+                lengths.append(len(spans))
+                continue
+            step = self.max_tokens - self.overlap
+            for start in range(0, len(spans) - self.overlap, step):
+                window = spans[start:start + self.max_tokens]
+                chunks.append(text[window[0][0]:window[-1][1]])
+                owners.append(i)
+                lengths.append(len(window))
+        return chunks, owners, lengths
+
+    def batches(self, lengths: Sequence[int]) -> List[np.ndarray]:
+        """Group chunk positions by token length into batches under the token budget"""
+
+        order = np.argsort(np.asarray(lengths), kind="stable")
+        batches, current = [], []
+        for position in order:
+            # Sorted ascending, so this chunk is the longest in the batch so far
+            padded = (len(current) + 1) * max(lengths[position], 1)
+            if current and (padded > self.batch_tokens or len(current) >= self.max_batch):
+                batches.append(np.asarray(current))
+                current = []
+            current.append(position)
+        if current:
+            batches.append(np.asarray(current))
+        return batches
+
+    def encode(self, texts: Sequence[str], **kwargs) -> np.ndarray:
+        """Encode texts like the wrapped model, one pooled vector per text"""
+
+        texts = list(texts)
+        kwargs.pop("batch_size", None)
+        if not texts:
+            return np.asarray(self.model.encode(texts, **kwargs), dtype=np.float32)
+
+        chunks, owners, lengths = self.chunk(texts)
+        batches = self.batches(lengths)
+        vectors = None
+        for batch in batches:
+            encoded = np.asarray(self.model.encode([chunks[p] for p in batch], batch_size=len(batch), **kwargs),
+                                 dtype=np.float32)
+            if vectors is None:
+                vectors = np.empty((len(chunks), encoded.shape[1]), dtype=np.float32)
+            vectors[batch] = encoded
+
+        owners = np.asarray(owners)
+        chunked = int((np.bincount(owners, minlength=len(texts)) > 1).sum())
+        with self._stats_lock:
+            self.stats["texts"] += len(texts)
+            self.stats["chunked_texts"] += chunked
+            self.stats["chunks"] += len(chunks)
+            self.stats["batches"] += len(batches)
+            self.stats["tokens"] += int(sum(lengths))
+            self.stats["padded_tokens"] += sum(len(batch) * max(lengths[batch[-1]], 1) for batch in batches)
+
+        if not chunked:
+            return vectors
+        return self._pool(vectors, owners, np.maximum(np.asarray(lengths, dtype=np.float32), 1), len(texts))
+
+    def _pool(self, vectors: np.ndarray, owners: np.ndarray, weights: np.ndarray, count: int) -> np.ndarray:
+        # Token-weighted mean of each text's chunks
+        pooled = np.zeros((count, vectors.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, vectors * weights[:, None])
+        pooled /= np.maximum(np.bincount(owners, weights=weights, minlength=count), 1e-12)[:, None].astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        if np.allclose(norms, 1.0, atol=1e-3):
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
+
+def mixed_length_texts(count: int, seed: int = 0) -> List[str]:
+    """One-line queries, single experiences and multi-page postings/resumes, in a realistic mix"""
+
+    from experience_index import experience_text, flatten_experiences
+    from resume_data import RESUME_DATABASE
+
+    rng = np.random.default_rng(seed)
+    experiences = [experience_text(exp) for exp in flatten_experiences(RESUME_DATABASE)]
+    highlights = [h for exp in flatten_experiences(RESUME_DATABASE) for h in exp['highlights']]
+    texts = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            texts.append(str(rng.choice(highlights)))
+        elif kind < 0.85:
+            texts.append(str(rng.choice(experiences)))
+        else:
+            # Several pages: a full resume or a long posting
+            texts.append("\n\n".join(rng.choice(experiences, size=int(rng.integers(8, 40)))))
+    return texts
+
+def benchmark(model, texts: Sequence[str], batch_size: int = 32):
+    """Compare plain batched encoding with bucketed, chunked encoding"""
+
+    encoder = BucketedEncoder(model)
+    lengths = [len(spans) for spans in encoder._token_spans(texts)]
+    limit = encoder.max_tokens or max(lengths)
+    truncated = sum(max(0, n - limit) for n in lengths)
+    print(f"Texts: {len(texts)}  tokens: {sum(lengths)}  p50/p95/max tokens: "
+          f"{int(np.percentile(lengths, 50))}/{int(np.percentile(lengths, 95))}/{max(lengths)}  max_tokens: {encoder.max_tokens}")
+
+    model.encode(list(texts[:batch_size]), batch_size=batch_size)
+    started = time.perf_counter()
+    model.encode(list(texts), batch_size=batch_size)
+    plain = time.perf_counter() - started
+    embedded = sum(lengths) - truncated
+    print(f"{'plain':<10} {plain:7.2f} s  {len(texts) / plain:8.1f} texts/s  {embedded / plain:8.0f} tokens/s  "
+          f"{truncated} tokens truncated ({truncated / max(sum(lengths), 1):.0%})")
+
+    started = time.perf_counter()
+    encoder.encode(texts)
+    bucketed = time.perf_counter() - started
+    stats = encoder.stats
+    print(f"{'bucketed':<10} {bucketed:7.2f} s  {len(texts) / bucketed:8.1f} texts/s  {stats['tokens'] / bucketed:8.0f} tokens/s  "
+          f"0 tokens truncated, "
+          f"{stats['chunked_texts']} texts in {stats['chunks'] - stats['texts'] + stats['chunked_texts']} chunks, "
+          f"{stats['batches']} batches, padding efficiency {stats['tokens'] / max(stats['padded_tokens'], 1):.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Length-bucketed, chunked embedding")
+    parser.add_argument("--bench", action="store_true", help="Time plain vs bucketed encoding on a mix of text lengths")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5", help="sentence-transformers model name or path")
+    parser.add_argument("--texts", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.bench:
+        from sentence_transformers import SentenceTransformer
+        benchmark(SentenceTransformer(args.model), mixed_length_texts(args.texts))
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
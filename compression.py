@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Reduced-dimension, reduced-precision embedding storage for Deep Job Seek Mini
+
+Experience embeddings are projected to fewer dimensions (PCA, or plain
+truncation for Matryoshka-trained models) and stored as float16 or int8.
+Scoring is exact on the compressed vectors; optionally the top candidates are
+re-scored against full-precision vectors that stay memory-mapped on disk.
+
+    python compression.py --bench --rows 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import torch
+
+REDUCTIONS = ("pca", "truncate")
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+# Rows converted to float32 per BLAS call while scanning compressed codes
+SCAN_BLOCK_ROWS = 16384
+
+# Rows used to fit the PCA projection
+PCA_SAMPLE_ROWS = 20000
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k highest scores, best first"""
+
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+class CompressedEmbeddings:
+    """A compressed embedding matrix that scores full-width queries"""
+
+    def __init__(self, codes: np.ndarray, projection: Optional[np.ndarray], mean: Optional[np.ndarray],
+                 scales: Optional[np.ndarray], dims: int, full: Optional[np.ndarray] = None):
+        self.codes = codes
+        self.projection = projection
+        self.mean = mean
+        self.scales = scales
+        self.dims = dims
+        self.full = full
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, dims: int = 128, reduction: str = "pca", dtype: str = "float16",
+            keep_full: bool = False, full_path: Optional[str] = None, seed: int = 0) -> "CompressedEmbeddings":
+        """Compress an (n, d) embedding matrix
+
+        keep_full retains the full-precision matrix for reranking. With full_path
+        it is written to that .npy file and memory-mapped, so only the rows
+        being reranked are paged in.
+        """
+
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction '{reduction}', expected one of: {', '.join(REDUCTIONS)}")
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype '{dtype}', expected one of: {', '.join(STORAGE_DTYPES)}")
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        dims = min(dims or embeddings.shape[1], embeddings.shape[1])
+
+        if reduction == "pca":
+            rng = np.random.default_rng(seed)
+            sample = embeddings
+            if len(embeddings) > PCA_SAMPLE_ROWS:
+                sample = embeddings[rng.choice(len(embeddings), PCA_SAMPLE_ROWS, replace=False)]
+            mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+            projection = np.ascontiguousarray(vt[:dims].T, dtype=np.float32)
+            # Fewer sample rows than dims leaves fewer principal components
+            dims = projection.shape[1]
+            # Stored vectors are centered; scores() adds q.mean back so they stay
+            # comparable with uncompressed dot products
+            reduced = (embeddings - mean) @ projection
+        else:
+            mean = projection = None
+            reduced = embeddings[:, :dims]
+
+        scales = None
+        if dtype == "int8":
+            # Symmetric per-dimension quantization
+            scales = np.maximum(np.abs(reduced).max(axis=0), 1e-12) / 127.0
+            codes = np.clip(np.rint(reduced / scales), -127, 127).astype(np.int8)
+            scales = scales.astype(np.float32)
+        else:
+            codes = reduced.astype(dtype)
+
+        full = None
+        if keep_full:
+            full = embeddings
+            if full_path:
+                np.save(full_path, embeddings)
+                full = np.load(full_path, mmap_mode="r")
+
+        return cls(np.ascontiguousarray(codes), projection, mean, scales, dims, full)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory (a memory-mapped full matrix is not counted)"""
+
+        total = self.codes.nbytes
+        for array in (self.projection, self.mean, self.scales):
+            if array is not None:
+                total += array.nbytes
+        if self.full is not None and not isinstance(self.full, np.memmap):
+            total += self.full.nbytes
+        return total
+
+    def project_query(self, query: np.ndarray) -> np.ndarray:
+        """Map a full-width query into the compressed scoring space"""
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        reduced = query @ self.projection if self.projection is not None else query[:self.dims]
+        if self.scales is not None:
+            reduced = reduced * self.scales
+        return reduced.astype(np.float32)
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score every row (or only rows) against a full-width query"""
+
+        reduced = self.project_query(query)
+        count = len(self.codes) if rows is None else len(rows)
+        if self.codes.dtype == np.float32:
+            codes = self.codes if rows is None else self.codes[rows]
+            out = codes @ reduced
+        elif self.codes.dtype == np.float16:
+            codes = self.codes if rows is None else self.codes[rows]
+            # NumPy has no half-precision BLAS kernel; torch's CPU matmul does
+            out = (torch.from_numpy(codes) @ torch.from_numpy(reduced.astype(np.float16))).float().numpy()
+        else:
+            # No int8 kernel either, so scan in float32 blocks to keep the
+            # temporary copy small
+            out = np.empty(count, dtype=np.float32)
+            for start in range(0, count, SCAN_BLOCK_ROWS):
+                block = self.codes[start:start + SCAN_BLOCK_ROWS] if rows is None else \
+                    self.codes[rows[start:start + SCAN_BLOCK_ROWS]]
+                out[start:start + len(block)] = block.astype(np.float32) @ reduced
+
+        if self.mean is not None:
+            out += np.float32(np.asarray(query, dtype=np.float32).reshape(-1) @ self.mean)
+        return out
+
+    def rerank(self, query: np.ndarray, candidates: np.ndarray):
+        """Re-order candidate rows by full-precision score, returning (rows, scores)"""
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if self.full is None or not len(candidates):
+            return candidates, self.scores(query, candidates)
+        # Sorted row order reads a memory-mapped matrix sequentially
+        ordered = np.sort(candidates)
+        full_scores = np.asarray(self.full[ordered], dtype=np.float32) @ query
+        order = np.argsort(full_scores)[::-1]
+        return ordered[order], full_scores[order]
+
+def recall_at_k(full: np.ndarray, compressed: CompressedEmbeddings, queries: np.ndarray,
+                ks: Iterable[int] = (1, 5, 10), rerank: int = 0,
+                exact: Optional[np.ndarray] = None) -> Dict[int, float]:
+    """Mean recall@k of compressed search against exact full-precision search
+
+    exact may carry precomputed full-precision top-k rows, one per query.
+    """
+
+    ks = sorted(ks)
+    if exact is None:
+        exact = [top_indices(full @ query, ks[-1]) for query in queries]
+    hits = {k: 0.0 for k in ks}
+    for query, expected in zip(queries, exact):
+        approx = top_indices(compressed.scores(query), max(ks[-1], rerank))
+        if rerank:
+            approx, _ = compressed.rerank(query, approx)
+        for k in ks:
+            hits[k] += len(set(expected[:k].tolist()) & set(approx[:k].tolist())) / k
+    return {k: round(hits[k] / len(queries), 4) for k in ks}
+
+def synthetic_embeddings(rows: int, dim: int = 384, rank: int = 48, noise: float = 0.15, seed: int = 0) -> np.ndarray:
+    """Unit vectors concentrated near a low-rank subspace, like sentence embeddings"""
+
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dim)).astype(np.float32)
+    weights = rng.standard_normal((rows, rank)).astype(np.float32) * np.linspace(2.0, 0.2, rank, dtype=np.float32)
+    vectors = weights @ basis + noise * np.sqrt(rank) * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def benchmark(rows: int = 100000, queries: int = 200, dims_options=(128, 256), dtypes=("float16", "int8"),
+              reduction: str = "pca", rerank: int = 50):
+    """Report memory, scan time and recall@k for compressed configurations"""
+
+    data = synthetic_embeddings(rows + queries)
+    full, query_vectors = data[:rows], data[rows:]
+
+    def scan_ms(score):
+        start = time.perf_counter()
+        for query in query_vectors[:50]:
+            top_indices(score(query), 10)
+        return (time.perf_counter() - start) / 50 * 1000
+
+    baseline_ms = scan_ms(lambda q: full @ q)
+    exact = [top_indices(full @ query, 10) for query in query_vectors]
+    print(f"\n{'config':<18} {'MB':>8} {'cut':>6} {'scan ms':>8} {'R@1':>6} {'R@5':>6} {'R@10':>6}   rerank top-{rerank}: R@1 R@5 R@10")
+    print(f"{'float32 x ' + str(full.shape[1]):<18} {full.nbytes / 1e6:>8.1f} {'1.0x':>6} {baseline_ms:>8.2f} "
+          f"{1.0:>6} {1.0:>6} {1.0:>6}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        full_path = os.path.join(tmp_dir, "full.npy")
+        for dims in dims_options:
+            for dtype in dtypes:
+                compressed = CompressedEmbeddings.fit(full, dims, reduction, dtype, keep_full=True, full_path=full_path)
+                plain = recall_at_k(full, compressed, query_vectors, exact=exact)
+                reranked = recall_at_k(full, compressed, query_vectors, rerank=rerank, exact=exact)
+                name = f"{dtype} x {dims}"
+                print(f"{name:<18} {compressed.nbytes / 1e6:>8.1f} {full.nbytes / compressed.nbytes:>5.1f}x "
+                      f"{scan_ms(compressed.scores):>8.2f} {plain[1]:>6} {plain[5]:>6} {plain[10]:>6}   "
+                      f"{reranked[1]} {reranked[5]} {reranked[10]}")
+                del compressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed embedding storage")
+    parser.add_argument("--bench", action="store_true", help="Report memory, scan time and recall@k")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--reduction", choices=REDUCTIONS, default="pca")
+    parser.add_argument("--rerank", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.rows, args.queries, reduction=args.reduction, rerank=args.rerank)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate experience detection for Deep Job Seek Mini
+
+Work entries are grouped when their text is near-identical (MinHash/LSH over
+word shingles) or their embeddings are nearly parallel (cosine threshold).
+Each group collapses into one canonical row that keeps pointers to its sources.
+Only entries of the same person are grouped, so a canonical row never mixes
+one candidate's highlights and skills into another's.
+
+    python dedup.py --bench --rows 5000
+"""
+
+import argparse
+import re
+import time
+import zlib
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Modulus for the MinHash permutations: 32-bit shingle hashes times 31-bit
+# coefficients stay below 2**63, so the arithmetic fits in uint64
+_MINHASH_PRIME = (1 << 31) - 1
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Return the set of lowercase word k-grams of a text"""
+
+    tokens = re.findall(r"[a-z0-9+#]+", text.lower())
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Exact Jaccard similarity of two sets"""
+
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class MinHasher:
+    """MinHash signatures with banded LSH candidate generation"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.a = rng.integers(1, _MINHASH_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MINHASH_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Return the MinHash signature of a text's shingles"""
+
+        grams = shingles(text)
+        if not grams:
+            return np.full(self.num_perm, _MINHASH_PRIME, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        return ((np.outer(hashes, self.a) + self.b) % _MINHASH_PRIME).min(axis=0)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """Return a (len(texts), num_perm) signature matrix"""
+
+        if not texts:
+            return np.zeros((0, self.num_perm), dtype=np.uint64)
+        return np.vstack([self.signature(text) for text in texts])
+
+    def candidate_pairs(self, signatures: np.ndarray) -> Set[Tuple[int, int]]:
+        """Return row pairs that share at least one LSH band bucket"""
+
+        pairs = set()
+        for band in range(self.bands):
+            buckets = {}
+            band_slice = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            for row, key in enumerate(band_slice):
+                buckets.setdefault(key.tobytes(), []).append(row)
+            for rows in buckets.values():
+                for i in range(len(rows)):
+                    for j in range(i + 1, len(rows)):
+                        pairs.add((rows[i], rows[j]))
+        return pairs
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def _union(parent: List[int], i: int, j: int):
+    root_i, root_j = _find(parent, i), _find(parent, j)
+    if root_i != root_j:
+        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+def cosine_pairs(embeddings: np.ndarray, threshold: float, block_size: int = 1024) -> List[Tuple[int, int]]:
+    """Return row pairs whose embeddings have cosine similarity >= threshold
+
+    Similarities are computed one block of rows at a time, so memory stays at
+    block_size x n floats instead of n x n.
+    """
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.maximum(norms, 1e-12)
+
+    pairs = []
+    for start in range(0, len(normalized), block_size):
+        block = normalized[start:start + block_size] @ normalized.T
+        rows, cols = np.nonzero(block >= threshold)
+        rows += start
+        upper = cols > rows
+        pairs.extend(zip(rows[upper].tolist(), cols[upper].tolist()))
+    return pairs
+
+def _merge_highlights(highlight_lists: List[List[str]], threshold: float) -> List[str]:
+    """Merge highlight lists in order, dropping near-identical highlights"""
+
+    merged, merged_shingles = [], []
+    for highlights in highlight_lists:
+        for highlight in highlights:
+            grams = shingles(highlight, k=2)
+            if any(jaccard(grams, seen) >= threshold for seen in merged_shingles):
+                continue
+            merged.append(highlight)
+            merged_shingles.append(grams)
+    return merged
+
+def deduplicate_experiences(experiences: List[Dict[str, Any]], texts: List[str], embeddings: np.ndarray,
+                            jaccard_threshold: float = 0.8, cosine_threshold: float = 0.97,
+                            highlight_threshold: float = 0.7, owners: Optional[Sequence[Hashable]] = None):
+    """Collapse near-duplicate experiences into canonical rows
+
+    Rows are only grouped with rows of the same owner: owners[i] if given (the
+    person's position in the database), otherwise the experience's 'person'.
+    Returns (canonical_experiences, canonical_embeddings, stats). Every canonical
+    experience carries a 'sources' list pointing back at the rows it replaced.
+    """
+
+    n = len(experiences)
+    parent = list(range(n))
+    if owners is None:
+        owners = [exp.get('person') for exp in experiences]
+
+    hasher = MinHasher()
+    signatures = hasher.signatures(texts)
+    for i, j in hasher.candidate_pairs(signatures):
+        # Verify LSH candidates on the estimated Jaccard similarity
+        if owners[i] == owners[j] and np.mean(signatures[i] == signatures[j]) >= jaccard_threshold:
+            _union(parent, i, j)
+
+    if n:
+        for i, j in cosine_pairs(embeddings, cosine_threshold):
+            if owners[i] == owners[j]:
+                _union(parent, i, j)
+
+    groups = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+
+    canonical, keep_rows = [], []
+    highlights_before = highlights_after = 0
+    for members in groups.values():
+        # The most detailed entry represents the group
+        representative = max(members, key=lambda i: len(texts[i]))
+        highlight_lists = [experiences[representative]['highlights']] + \
+                          [experiences[i]['highlights'] for i in members if i != representative]
+        highlights = _merge_highlights(highlight_lists, highlight_threshold)
+
+        skills = []
+        for i in members:
+            skills.extend(skill for skill in experiences[i].get('skills', []) if skill not in skills)
+
+        row = dict(experiences[representative])
+        row['highlights'] = highlights
+        row['skills'] = skills
+        row['sources'] = [
+            {'row': i, 'person': experiences[i]['person'], 'company': experiences[i]['company'],
+             'position': experiences[i]['position']}
+            for i in members
+        ]
+        canonical.append(row)
+        keep_rows.append(representative)
+
+        highlights_before += sum(len(experiences[i]['highlights']) for i in members)
+        highlights_after += len(highlights)
+
+    stats = {
+        "rows_before": n,
+        "rows_after": len(canonical),
+        "highlights_before": highlights_before,
+        "highlights_after": highlights_after
+    }
+    return canonical, embeddings[keep_rows] if n else embeddings, stats
+
+_BENCH_ROLES = ["Backend Engineer", "Data Scientist", "DevOps Engineer", "Frontend Developer", "Security Analyst",
+                "Platform Engineer", "ML Engineer", "Site Reliability Engineer", "Mobile Developer", "QA Engineer"]
+_BENCH_WORDS = ("python java kubernetes aws terraform react node postgres redis kafka spark airflow docker grafana "
+                "prometheus pytorch tensorflow pandas graphql rest microservices latency throughput migration "
+                "pipeline dashboards alerting onboarding mentoring roadmap budget compliance audit testing").split()
+_BENCH_BOILERPLATE = ["Collaborated with cross-functional teams", "Participated in agile ceremonies",
+                      "Mentored junior engineers", "Wrote technical documentation"]
+
+def synthetic_corpus(rows: int, duplicate_rate: float = 0.4, seed: int = 7) -> List[Dict[str, Any]]:
+    """Generate synthetic experiences where a share of rows are reworded copies"""
+
+    rng = np.random.default_rng(seed)
+    experiences = []
+    while len(experiences) < rows:
+        if experiences and rng.random() < duplicate_rate:
+            # Reword an existing entry: drop one word and add boilerplate
+            source = experiences[int(rng.integers(len(experiences)))]
+            words = source['summary'].split()
+            del words[int(rng.integers(len(words)))]
+            highlights = list(source['highlights']) + [str(rng.choice(_BENCH_BOILERPLATE))]
+            experiences.append(dict(source, summary=" ".join(words), highlights=highlights))
+            continue
+
+        role = str(rng.choice(_BENCH_ROLES))
+        summary = " ".join(rng.choice(_BENCH_WORDS, size=18))
+        highlights = [" ".join(rng.choice(_BENCH_WORDS, size=8)) for _ in range(3)] + [str(rng.choice(_BENCH_BOILERPLATE))]
+        experiences.append({
+            'person': f"Candidate {len(experiences)}",
+            'company': f"Company {len(experiences)}",
+            'position': role,
+            'summary': summary,
+            'highlights': highlights,
+            'skills': list(rng.choice(_BENCH_WORDS, size=5))
+        })
+    return experiences
+
+def benchmark(rows: int = 5000, queries: int = 200, top_k: int = 5):
+    """Report index size reduction and search speedup on a synthetic corpus"""
+
+    from backends import HashingEmbedder
+    from experience_index import ExperienceIndex, experience_text
+
+    embedder = HashingEmbedder()
+    experiences = synthetic_corpus(rows)
+    texts = [experience_text(exp) for exp in experiences]
+    embeddings = embedder.encode(texts)
+
+    start = time.perf_counter()
+    canonical, canonical_embeddings, stats = deduplicate_experiences(experiences, texts, embeddings)
+    dedup_seconds = time.perf_counter() - start
+
+    full_index = ExperienceIndex(experiences, embeddings)
+    deduped_index = ExperienceIndex(canonical, canonical_embeddings)
+    query_vectors = embedder.encode([" ".join(np.random.default_rng(i).choice(_BENCH_WORDS, size=12)) for i in range(queries)])
+
+    timings = {}
+    for name, index in (("full", full_index), ("deduped", deduped_index)):
+        start = time.perf_counter()
+        for query in query_vectors:
+            index.search(query, top_k=top_k)
+        timings[name] = (time.perf_counter() - start) / queries * 1000
+
+    print(f"Rows:        {stats['rows_before']} -> {stats['rows_after']} "
+          f"({100 * (1 - stats['rows_after'] / stats['rows_before']):.1f}% smaller)")
+    print(f"Highlights:  {stats['highlights_before']} -> {stats['highlights_after']}")
+    print(f"Matrix:      {embeddings.nbytes / 1e6:.1f} MB -> {canonical_embeddings.nbytes / 1e6:.1f} MB")
+    print(f"Dedup time:  {dedup_seconds:.2f}s")
+    print(f"Search:      {timings['full']:.3f} ms -> {timings['deduped']:.3f} ms per query "
+          f"({timings['full'] / timings['deduped']:.2f}x)")
+    return stats, timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate experience detection")
+    parser.add_argument("--bench", action="store_true", help="Run the synthetic corpus benchmark")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.rows, args.queries)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
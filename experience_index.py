@@ -0,0 +1,254 @@
+"""
+Precomputed experience embedding index for Deep Job Seek Mini
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from compression import CompressedEmbeddings, top_indices
+from dedup import deduplicate_experiences
+from tag_filters import TagFilter, TagTaxonomy
+
+# Filters letting through more than this share of rows score the full matrix
+SUBSET_SCORING_MAX_FRACTION = 0.25
+
+def flatten_experiences(database: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten every work entry in the resume database into a searchable experience"""
+
+    return [work_experience(person, exp) for person in database for exp in person.get('work', [])]
+
+def work_experience(person: Dict[str, Any], exp: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one work entry of a resume into a searchable experience"""
+
+    return {
+        'person': person['basics']['name'],
+        'company': exp.get('name', ''),
+        'position': exp.get('position', ''),
+        'summary': exp.get('summary', ''),
+        'highlights': exp.get('highlights', []),
+        'skills': person.get('skills', [])
+    }
+
+def experience_text(exp: Dict[str, Any]) -> str:
+    """Create the searchable text for a flattened experience"""
+
+    return f"{exp.get('position', '')} {exp.get('summary', '')} {' '.join(exp.get('highlights', []))}"
+
+def tag_text(exp: Dict[str, Any]) -> str:
+    """Create the text a flattened experience is tagged from (its text plus the person's skills)"""
+
+    return f"{experience_text(exp)} {' '.join(exp.get('skills', []))}"
+
+class HighlightIndex:
+    """Every highlight embedding in one flat matrix, with offsets back to experience rows
+
+    Row i's highlights are embeddings[offsets[i]:offsets[i + 1]], in the same
+    order as experiences[i]['highlights'].
+    """
+
+    def __init__(self, embeddings: np.ndarray, offsets: np.ndarray):
+        self.embeddings = embeddings
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, experiences: List[Dict[str, Any]], embedding_model) -> "HighlightIndex":
+        """Embed the highlights of every experience in a single batched call"""
+
+        counts = [len(exp.get('highlights', [])) for exp in experiences]
+        offsets = np.zeros(len(experiences) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+
+        texts = [highlight for exp in experiences for highlight in exp.get('highlights', [])]
+        if not texts:
+            return cls(np.zeros((0, 0), dtype=np.float32), offsets)
+        return cls(np.ascontiguousarray(embedding_model.encode(texts), dtype=np.float32), offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.embeddings.nbytes + self.offsets.nbytes
+
+    def select(self, query_embedding: np.ndarray, rows: np.ndarray, per_row: int = 3) -> List[np.ndarray]:
+        """Return, for each row, the positions of its per_row best highlights, best first
+
+        The highlights of all rows are scored in one matmul and ranked with a
+        single segmented sort, instead of one pass per experience.
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return [np.zeros(0, dtype=np.int64) for _ in rows]
+
+        # Segment id and position within the segment of every gathered highlight
+        segment = np.repeat(np.arange(len(rows)), counts)
+        segment_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        local = np.arange(total) - segment_starts
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        scores = self.embeddings[starts[segment] + local].astype(np.float32, copy=False) @ query
+
+        # Sorting by (segment, -score) keeps segments in place, so rank within a
+        # segment is just the offset from its start
+        order = np.lexsort((-scores, segment))
+        keep = order[local < per_row]
+        kept = np.minimum(counts, per_row)
+        return np.split(local[keep], np.cumsum(kept)[:-1])
+
+class ExperienceIndex:
+    """Experience rows with their embeddings stacked into one matrix"""
+
+    def __init__(self, experiences: List[Dict[str, Any]], embeddings: np.ndarray, dedup_stats: Dict[str, int] = None,
+                 row_people: Union[List[Tuple[int, ...]], np.ndarray] = None):
+        self.experiences = experiences
+        self.embeddings = embeddings
+        self.dedup_stats = dedup_stats
+        # Database positions of the people each row came from (a flat array
+        # when every row has exactly one)
+        self.row_people = row_people if row_people is not None else []
+        self.compressed = None
+        self.rerank = 0
+        self.highlights: Optional[HighlightIndex] = None
+        # (words, rows) uint64 requirement tag bitsets, see tag_filters.py
+        self.tags: Optional[np.ndarray] = None
+        self.taxonomy: Optional[TagTaxonomy] = None
+
+    @classmethod
+    def build(cls, database: List[Dict[str, Any]], embedding_model, dedup: bool = False,
+              highlights: bool = False, tags: bool = False) -> "ExperienceIndex":
+        """Embed every experience in the database in a single batched call
+
+        With dedup=True near-duplicate work entries are collapsed into canonical
+        rows (see dedup.deduplicate_experiences) before the index is built.
+        With highlights=True each row's highlights are embedded too, so search
+        can return the highlights most relevant to the query. With tags=True
+        each row is tagged with the requirement taxonomy for TagFilter searches.
+        """
+
+        index = cls._build(database, embedding_model, dedup)
+        if highlights:
+            index.highlights = HighlightIndex.build(index.experiences, embedding_model)
+        if tags:
+            index.taxonomy = TagTaxonomy()
+            index.tags = index.taxonomy.encode(tag_text(exp) for exp in index.experiences)
+        return index
+
+    @classmethod
+    def _build(cls, database: List[Dict[str, Any]], embedding_model, dedup: bool) -> "ExperienceIndex":
+        experiences = flatten_experiences(database)
+        if not experiences:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+
+        # flatten_experiences walks people in order, so this lines up row by row
+        positions = [i for i, person in enumerate(database) for _ in person.get('work', [])]
+        texts = [experience_text(exp) for exp in experiences]
+        embeddings = np.ascontiguousarray(embedding_model.encode(texts), dtype=np.float32)
+
+        if dedup:
+            experiences, embeddings, stats = deduplicate_experiences(experiences, texts, embeddings, owners=positions)
+            row_people = [tuple(sorted({positions[source['row']] for source in exp['sources']})) for exp in experiences]
+            return cls(experiences, np.ascontiguousarray(embeddings), stats, row_people)
+
+        return cls(experiences, embeddings, row_people=[(position,) for position in positions])
+
+    def __len__(self) -> int:
+        return len(self.experiences)
+
+    def compress(self, dims: int = 128, reduction: str = "pca", dtype: str = "float16",
+                 rerank: int = 0, full_path: str = None) -> "ExperienceIndex":
+        """Replace the float32 matrix with a compressed one (see compression.py)
+
+        With rerank > 0 that many compressed candidates are re-scored at full
+        precision; full_path keeps those vectors memory-mapped on disk.
+        """
+
+        if self.experiences:
+            self.compressed = CompressedEmbeddings.fit(self.embeddings, dims, reduction, dtype,
+                                                       keep_full=rerank > 0, full_path=full_path)
+            self.embeddings = None
+            self.rerank = rerank
+            if self.highlights is not None:
+                # Highlights are only ranked against each other, so half precision is plenty
+                self.highlights.embeddings = self.highlights.embeddings.astype(np.float16)
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory by the embedding matrices and tags"""
+
+        nbytes = self.compressed.nbytes if self.compressed is not None else self.embeddings.nbytes
+        nbytes += self.highlights.nbytes if self.highlights is not None else 0
+        return nbytes + (self.tags.nbytes if self.tags is not None else 0)
+
+    def scores(self, query_embedding: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot-product similarity of every row (or only rows) with the query"""
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.compressed is not None:
+            return self.compressed.scores(query, rows)
+        return (self.embeddings if rows is None else self.embeddings[rows]) @ query
+
+    def top_rows(self, query_embedding: np.ndarray, top_k: int = 5, allowed: Optional[np.ndarray] = None):
+        """Return (rows, scores) of the best top_k rows, optionally only where allowed is True"""
+
+        if not self.experiences:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Filtered-out rows are not scored, unless most rows pass: gathering
+        # them would then cost more than scoring the whole matrix
+        candidates = np.flatnonzero(allowed) if allowed is not None else None
+        if candidates is not None and len(candidates) > SUBSET_SCORING_MAX_FRACTION * len(self):
+            scores = self.scores(query_embedding)[candidates]
+        else:
+            scores = self.scores(query_embedding, candidates)
+
+        positions = top_indices(scores, max(top_k, self.rerank))
+        rows = positions if candidates is None else candidates[positions]
+        if self.rerank:
+            rows, row_scores = self.compressed.rerank(np.asarray(query_embedding, dtype=np.float32).reshape(-1), rows)
+        else:
+            row_scores = scores[positions]
+        return rows[:top_k], row_scores[:top_k]
+
+    def rows_to_experiences(self, query_embedding: np.ndarray, rows: np.ndarray,
+                            highlights_per_row: int = 0) -> List[Dict[str, Any]]:
+        """Return the experiences at rows
+
+        With highlights_per_row > 0 and a highlight index, each experience is a
+        shallow copy whose highlights are its best highlights for the query.
+        """
+
+        # Disk-backed experiences (resume_store.StoredExperiences) are fetched in one query
+        fetch = getattr(self.experiences, "fetch", None)
+        experiences = fetch(rows) if fetch else [self.experiences[i] for i in rows]
+        if not highlights_per_row or self.highlights is None:
+            return experiences
+
+        selected = self.highlights.select(query_embedding, rows, highlights_per_row)
+        results = []
+        for exp, positions in zip(experiences, selected):
+            exp = dict(exp)
+            exp['highlights'] = [exp['highlights'][p] for p in positions]
+            results.append(exp)
+        return results
+
+    def filter_rows(self, tag_filter: Optional[TagFilter]) -> Optional[np.ndarray]:
+        """Return the bool mask of rows passing tag_filter, or None when unfiltered"""
+
+        if not tag_filter:
+            return None
+        if self.tags is None:
+            raise ValueError("Index was built without tags; build it with tags=True to filter")
+        return tag_filter.rows(self.tags, self.taxonomy)
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5, highlights_per_row: int = 0,
+               tag_filter: Optional[TagFilter] = None) -> List[Dict[str, Any]]:
+        """Return the top_k experiences by dot-product similarity
+
+        With a tag_filter only rows passing it are scored candidates.
+        """
+
+        rows, _ = self.top_rows(query_embedding, top_k, self.filter_rows(tag_filter))
+        return self.rows_to_experiences(query_embedding, rows, highlights_per_row)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk export of resumes for Deep Job Seek Mini
+
+Resumes are consumed from an iterator and written one at a time through a
+buffered writer, so memory use stays constant however many resumes are exported.
+
+    python export.py --format jsonl --out resumes.jsonl
+    python export.py --format markdown --jobs jobs.jsonl --out tailored.md.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, TextIO
+
+from utils import iter_resume_markdown
+
+# Bytes buffered per writer before hitting the disk
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+MARKDOWN_SEPARATOR = "\n\n---\n\n"
+
+def _write_jsonl(resumes: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    count = 0
+    for resume in resumes:
+        out.write(json.dumps(resume, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+def _write_json(resumes: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    # A compact JSON array, written element by element instead of json.dump(list)
+    count = 0
+    out.write("[")
+    for resume in resumes:
+        if count:
+            out.write(",")
+        out.write(json.dumps(resume, ensure_ascii=False, separators=(",", ":")))
+        count += 1
+    out.write("]\n")
+    return count
+
+def _write_markdown(resumes: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    count = 0
+    for resume in resumes:
+        if count:
+            out.write(MARKDOWN_SEPARATOR)
+        for line in iter_resume_markdown(resume):
+            out.write(line)
+            out.write("\n")
+        count += 1
+    return count
+
+EXPORT_FORMATS = {
+    "jsonl": _write_jsonl,
+    "json": _write_json,
+    "markdown": _write_markdown
+}
+
+def export_resumes(resumes: Iterable[Dict[str, Any]], path: str, fmt: str = "jsonl",
+                   buffer_size: int = EXPORT_BUFFER_SIZE) -> int:
+    """Stream resumes to a file in the given format and return how many were written
+
+    Paths ending in .gz are gzip-compressed. The file is written under a
+    temporary name and moved into place only once the export has finished.
+    """
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of: {', '.join(EXPORT_FORMATS)}")
+
+    tmp_path = f"{path}.tmp"
+    if path.endswith(".gz"):
+        raw = open(tmp_path, "wb", buffering=buffer_size)
+        out = gzip.open(raw, "wt", encoding="utf-8")
+    else:
+        raw = None
+        out = open(tmp_path, "w", encoding="utf-8", buffering=buffer_size)
+
+    try:
+        with out:
+            count = EXPORT_FORMATS[fmt](resumes, out)
+        if raw is not None:
+            raw.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if raw is not None:
+            raw.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return count
+
+def iter_job_descriptions(path: str) -> Iterator[str]:
+    """Lazily read job descriptions from a JSONL or plain text file
+
+    JSONL lines may carry the text under "job_description" or "body"; any
+    other line is taken verbatim as one job description.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                text = record.get("job_description") or record.get("body") or ""
+            else:
+                text = line
+            if text.strip():
+                yield text
+
+def iter_generated_resumes(job_descriptions: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Lazily generate one tailored resume per job description"""
+
+    # Imported here so exporting stored resumes doesn't load the model stack
+    from app import build_tailored_resume
+
+    for job_description in job_descriptions:
+        yield build_tailored_resume(job_description, record_query=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream resumes to JSONL, JSON or Markdown")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+    parser.add_argument("--out", required=True, help="Output path (.gz to compress)")
+    parser.add_argument("--jobs", help="JSONL or text file of job descriptions to generate tailored resumes for; "
+                                       "without it the stored resume database is exported")
+    parser.add_argument("--store", help="Export this SQLite resume store (see resume_store.py) instead of resume_data.py")
+    args = parser.parse_args()
+
+    if args.jobs:
+        resumes = iter_generated_resumes(iter_job_descriptions(args.jobs))
+    elif args.store:
+        from resume_store import ResumeStore
+        resumes = iter(ResumeStore(args.store))
+    else:
+        from resume_data import RESUME_DATABASE
+        resumes = iter(RESUME_DATABASE)
+
+    count = export_resumes(resumes, args.out, args.format)
+    print(f"✅ Exported {count} resumes to {args.out}")
+
+if __name__ == "__main__":
+    main()
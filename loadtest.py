@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Concurrent load-testing harness for Deep Job Seek Mini
+
+Replays job descriptions from a JSONL corpus against the resume pipeline,
+either in-process or over the local HTTP API (server.py) or Gradio API, and
+reports throughput with p50/p95/p99 latency end to end and per stage.
+
+    python loadtest.py --stand-in-models --concurrency 4 --requests 200
+    python loadtest.py --target http --url http://127.0.0.1:8000 --rate 5 --duration 60
+
+Without --rate the test is closed-loop: `concurrency` clients send requests
+back to back. With --rate requests arrive as a Poisson process. Latency is then
+measured from each request's scheduled arrival, so time spent queued behind
+busy clients counts against the replica.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from export import iter_job_descriptions
+from resume_data import EXAMPLE_JOBS
+
+DEFAULT_CORPUS = "requests.jsonl"
+
+PERCENTILES = (50, 95, 99)
+
+def install_stand_in_models(generate_latency_ms: float = 0.0):
+    """Select the offline hashing/template backends for models app loads from now on"""
+
+    os.environ["EMBEDDING_BACKEND"] = "hashing"
+    os.environ["GENERATOR_BACKEND"] = "template"
+    os.environ["GENERATOR_OPTIONS"] = json.dumps({"latency_ms": generate_latency_ms})
+
+def load_corpus(path: Optional[str], shuffle_seed: Optional[int] = None) -> List[str]:
+    """Load a replayable list of job descriptions, optionally shuffled deterministically"""
+
+    if path and os.path.exists(path):
+        jobs = list(iter_job_descriptions(path))
+    else:
+        jobs = []
+    if not jobs:
+        print(f"⚠️ No job descriptions in {path}, using built-in examples")
+        jobs = list(EXAMPLE_JOBS)
+    if shuffle_seed is not None:
+        random.Random(shuffle_seed).shuffle(jobs)
+    return jobs
+
+def inprocess_target() -> Callable[[str], Dict[str, float]]:
+    """Run the pipeline in this process and return its stage timings"""
+
+    import app
+    from profiling import collect_stages
+
+    def run(job_description):
+        with collect_stages() as recorder:
+            app.build_tailored_resume(job_description, record_query=False)
+        return dict(recorder.stages)
+
+    return run
+
+def _parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if name and params.startswith("dur="):
+            stages[name] = float(params[4:])
+    return stages
+
+def http_target(url: str, timeout: float = 300) -> Callable[[str], Dict[str, float]]:
+    """POST to the server.py JSON API and read stage timings from Server-Timing"""
+
+    endpoint = url.rstrip("/") + "/generate"
+
+    def run(job_description):
+        request = urllib.request.Request(
+            endpoint,
+            data=json.dumps({"job_description": job_description}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return _parse_server_timing(response.headers.get("Server-Timing"))
+
+    return run
+
+def gradio_target(url: str) -> Callable[[str], Dict[str, float]]:
+    """Call the Gradio app's generate_resume endpoint (end-to-end timing only)"""
+
+    from gradio_client import Client
+
+    local = threading.local()
+
+    def run(job_description):
+        # Clients hold a session, so each load-generating thread gets its own
+        if not hasattr(local, "client"):
+            local.client = Client(url, verbose=False)
+        resume, status = local.client.predict(job_description, api_name="/generate_resume")
+        if resume is None:
+            raise RuntimeError(status)
+        return {}
+
+    return run
+
+def run_load(target: Callable[[str], Dict[str, float]], jobs: List[str], concurrency: int = 4,
+             requests: Optional[int] = None, duration: Optional[float] = None,
+             rate: Optional[float] = None, seed: int = 0) -> Dict[str, Any]:
+    """Drive the target and return raw per-request results plus wall time"""
+
+    if requests is None and duration is None:
+        requests = len(jobs)
+
+    results = []
+    results_lock = threading.Lock()
+
+    def one(job_description, scheduled_at):
+        started = time.perf_counter()
+        try:
+            stages = target(job_description)
+            error = None
+        except Exception as e:
+            stages, error = {}, str(e)
+        finished = time.perf_counter()
+        with results_lock:
+            results.append({
+                "latency_ms": (finished - (scheduled_at or started)) * 1000,
+                "service_ms": (finished - started) * 1000,
+                "stages": stages,
+                "error": error
+            })
+
+    arrivals = random.Random(seed)
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+    next_arrival = start
+    sent = 0
+    sent_lock = threading.Lock()
+
+    def client():
+        # Closed loop: each client sends its next request only after the previous one finished
+        nonlocal sent
+        while deadline is None or time.perf_counter() < deadline:
+            with sent_lock:
+                if requests is not None and sent >= requests:
+                    return
+                job_description = jobs[sent % len(jobs)]
+                sent += 1
+            one(job_description, None)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if not rate:
+            for future in [pool.submit(client) for _ in range(concurrency)]:
+                future.result()
+        else:
+            while (requests is None or sent < requests) and (deadline is None or time.perf_counter() < deadline):
+                next_arrival += arrivals.expovariate(rate)
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(one, jobs[sent % len(jobs)], next_arrival)
+                sent += 1
+
+    return {"results": results, "elapsed_s": time.perf_counter() - start}
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {f"p{p}": 0.0 for p in PERCENTILES}
+    points = np.percentile(np.asarray(values), PERCENTILES)
+    return {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, points)}
+
+def summarize(run: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce raw results to throughput and latency percentiles"""
+
+    results = run["results"]
+    ok = [r for r in results if r["error"] is None]
+
+    stage_values = {}
+    for r in ok:
+        for name, elapsed_ms in r["stages"].items():
+            stage_values.setdefault(name, []).append(elapsed_ms)
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "elapsed_s": round(run["elapsed_s"], 3),
+        "throughput_rps": round(len(ok) / run["elapsed_s"], 3) if run["elapsed_s"] else 0.0,
+        "latency_ms": _percentiles([r["latency_ms"] for r in ok]),
+        "service_ms": _percentiles([r["service_ms"] for r in ok]),
+        "stages_ms": {name: _percentiles(values) for name, values in stage_values.items()},
+        "sample_errors": sorted({r["error"] for r in results if r["error"]})[:5]
+    }
+
+def print_report(summary: Dict[str, Any]):
+    print(f"\nRequests: {summary['requests']}  errors: {summary['errors']}  "
+          f"elapsed: {summary['elapsed_s']}s  throughput: {summary['throughput_rps']} req/s")
+    print(f"\n{'stage':<16} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    rows = [("end-to-end", summary["latency_ms"]), ("service", summary["service_ms"])] + \
+           sorted(summary["stages_ms"].items())
+    for name, p in rows:
+        print(f"{name:<16} {p['p50']:>10} {p['p95']:>10} {p['p99']:>10}")
+    if "single_flight" in summary:
+        print(f"\nSingle-flight: {summary['single_flight']['coalesced']} coalesced, "
+              f"{summary['single_flight']['leaders']} computed")
+    for error in summary["sample_errors"]:
+        print(f"❌ {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the resume pipeline")
+    parser.add_argument("--target", choices=["inprocess", "http", "gradio"], default="inprocess")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server URL for the http/gradio targets")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL or text file of job descriptions")
+    parser.add_argument("--shuffle-seed", type=int, default=None, help="Replay the corpus in a seeded random order")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate in requests/second")
+    parser.add_argument("--requests", type=int, default=None, help="Total requests (default: one pass over the corpus)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop sending after this many seconds")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed requests sent before measuring")
+    parser.add_argument("--stand-in-models", action="store_true", help="Use offline stand-in models (in-process only)")
+    parser.add_argument("--stand-in-generate-ms", type=float, default=0.0, help="Simulated generator latency")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.stand_in_models:
+        install_stand_in_models(args.stand_in_generate_ms)
+
+    if args.target == "inprocess":
+        target = inprocess_target()
+    elif args.target == "http":
+        target = http_target(args.url)
+    else:
+        target = gradio_target(args.url)
+
+    jobs = load_corpus(args.corpus, args.shuffle_seed)
+    for job_description in jobs[:args.warmup]:
+        target(job_description)
+
+    summary = summarize(run_load(target, jobs, args.concurrency, args.requests, args.duration, args.rate))
+    if args.target == "inprocess":
+        import app
+        summary["single_flight"] = app.single_flight_stats()
+    print_report(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
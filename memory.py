@@ -0,0 +1,73 @@
+"""
+Process memory reporting for Deep Job Seek Mini
+"""
+
+import os
+import sys
+import resource
+from typing import Dict
+
+
+def current_rss_mb() -> float:
+    """Return the current resident set size of this process in MB"""
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS, Windows): the peak is the best number we have
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB"""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def memory_report() -> Dict[str, float]:
+    """Return current (steady-state) and peak RSS in MB"""
+
+    rss = current_rss_mb()
+    # ru_maxrss is only refreshed periodically by the kernel, so it can lag the current RSS
+    peak = max(peak_rss_mb(), rss)
+    return {
+        "rss_mb": round(rss, 1),
+        "peak_rss_mb": round(peak, 1)
+    }
+
+
+def log_memory(label: str) -> Dict[str, float]:
+    """Print and return the memory report tagged with a label"""
+
+    report = memory_report()
+    print(f"🧠 [{label}] RSS: {report['rss_mb']} MB (peak {report['peak_rss_mb']} MB)")
+    return report
+
+
+def process_memory_mb(pid: int) -> Dict[str, float]:
+    """Return RSS, PSS and USS in MB for a process, from /proc/<pid>/smaps_rollup
+
+    PSS divides shared pages between the processes mapping them, and USS counts
+    only pages private to the process, so together they show how much of a
+    forked worker is still shared copy-on-write with its parent.
+    """
+
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+
+    uss_kb = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss_kb / 1024, 1)
+    }
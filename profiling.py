@@ -0,0 +1,294 @@
+"""
+On-demand per-request profiling for Deep Job Seek Mini
+
+Profiling is opt-in: for every request (PROFILE_REQUESTS=1), for a sampled
+share of requests (PROFILE_SAMPLE_RATE=0.01) or, when PROFILE_ALLOW_HEADER=1,
+for a single request that sets the X-Profile header. A profiled request writes
+to PROFILE_DIR, which keeps only the newest PROFILE_KEEP profiles:
+
+    <id>.json       stage timings and request metadata
+    <id>.collapsed  flamegraph-ready collapsed stacks from a stack sampler
+    <id>.prof       cProfile stats (PROFILE_MODE=cprofile only)
+
+cProfile only traces the thread that started it, so a request profiled with
+PROFILE_MODE=cprofile runs its pipeline stages one after another in that
+thread (see cprofile_active()) instead of on the stage graph's pool. The
+default sampler follows the pool threads and keeps stages concurrent.
+
+When profiling is off, profile_request() and stage() cost one context variable
+lookup and a couple of attribute checks. collect_stages() records stage timings
+alone, without sampling, for load tests and Server-Timing headers.
+"""
+
+import contextvars
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampler")  # "sampler" or "cprofile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))  # newest profiles kept in PROFILE_DIR, 0 keeps all
+PROFILE_HEADER = "X-Profile"
+# Clients can only opt in with the header when this is set, since every
+# profile costs a sampler thread and files on disk
+PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "0").lower() in ("1", "true", "yes")
+_PROFILE_SUFFIXES = (".json", ".collapsed", ".prof")
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+def header_requests_profile(headers) -> bool:
+    """Return True if request headers opt this request into profiling (PROFILE_ALLOW_HEADER only)"""
+
+    if not PROFILE_ALLOW_HEADER or not headers:
+        return False
+    value = headers.get(PROFILE_HEADER) or headers.get(PROFILE_HEADER.lower())
+    return str(value).lower() in ("1", "true", "yes")
+
+def should_profile(force: bool = False) -> bool:
+    """Decide whether the current request is profiled"""
+
+    if force or PROFILE_REQUESTS:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StageRecorder:
+    """Stage timings collected for one request"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.thread_stages = {threading.get_ident(): None}
+        # Set by record_graph() when the request ran as a stage graph
+        self.graph = None
+        self._lock = threading.Lock()
+
+    def record_stage(self, name: str, elapsed_ms: float):
+        # Stages of one request can finish concurrently on stage graph threads
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def record_count(self, name: str, value: float):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+class RequestProfile(StageRecorder):
+    """Stage timings and sampled stacks collected for one request"""
+
+    def __init__(self, name: str, mode: str = None, interval_ms: float = PROFILE_INTERVAL_MS):
+        super().__init__()
+        self.name = name
+        self.mode = mode or PROFILE_MODE
+        self.interval = interval_ms / 1000
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._profiler = None
+        self._started = 0.0
+        self.duration_ms = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.profile_id}", daemon=True)
+        self._sampler.start()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._stop.set()
+        self._sampler.join()
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, stage_name in list(self.thread_stages.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                if stage_name:
+                    stack.insert(0, f"stage:{stage_name}")
+                key = ";".join(stack)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def write(self, directory: str = None) -> str:
+        """Write the profile files and return their common path prefix"""
+
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, self.profile_id)
+
+        with open(f"{prefix}.collapsed", "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        if self._profiler is not None:
+            self._profiler.dump_stats(f"{prefix}.prof")
+
+        with open(f"{prefix}.json", "w") as f:
+            json.dump({
+                "id": self.profile_id,
+                "name": self.name,
+                "mode": self.mode,
+                "duration_ms": round(self.duration_ms, 3),
+                "stages_ms": {name: round(ms, 3) for name, ms in self.stages.items()},
+                "counters": self.counters,
+                "graph": self.graph,
+                "samples": self.samples,
+                "interval_ms": self.interval * 1000
+            }, f, indent=2)
+
+        if PROFILE_KEEP > 0:
+            prune_profiles(directory, PROFILE_KEEP)
+        return prefix
+
+def prune_profiles(directory: str, keep: int) -> int:
+    """Delete all but the newest `keep` profiles in a directory and return how many were deleted"""
+
+    newest = {}
+    for filename in os.listdir(directory):
+        profile_id, suffix = os.path.splitext(filename)
+        if suffix not in _PROFILE_SUFFIXES:
+            continue
+        try:
+            modified = os.path.getmtime(os.path.join(directory, filename))
+        except FileNotFoundError:
+            continue
+        newest[profile_id] = max(newest.get(profile_id, 0.0), modified)
+
+    # Ids start with a timestamp, which breaks ties between equal mtimes
+    stale = sorted(newest, key=lambda profile_id: (newest[profile_id], profile_id), reverse=True)[keep:]
+    for profile_id in stale:
+        for suffix in _PROFILE_SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                # Already gone, or pruned by a concurrent request
+                pass
+    return len(stale)
+
+@contextmanager
+def profile_request(name: str, force: bool = False):
+    """Profile the enclosed block if this request is selected for profiling"""
+
+    if not should_profile(force) or isinstance(_current_profile.get(), RequestProfile):
+        yield None
+        return
+
+    # A stage recorder from collect_stages() is replaced for the duration of the
+    # profile and receives the profiled stage timings afterwards
+    outer = _current_profile.get()
+    profile = RequestProfile(name)
+    token = _current_profile.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _current_profile.reset(token)
+        if outer is not None:
+            for stage_name, elapsed_ms in profile.stages.items():
+                outer.record_stage(stage_name, elapsed_ms)
+            for counter_name, value in profile.counters.items():
+                outer.record_count(counter_name, value)
+            outer.graph = profile.graph
+        prefix = profile.write()
+        print(f"🔬 Profiled {name} in {profile.duration_ms:.1f} ms -> {prefix}.*")
+
+@contextmanager
+def collect_stages():
+    """Record stage timings for the enclosed block without sampling stacks
+
+    Used by the load tester and the Server-Timing header. A request that is
+    already being profiled keeps its profile, which records the same timings.
+    """
+
+    recorder = _current_profile.get()
+    if recorder is not None:
+        yield recorder
+        return
+
+    recorder = StageRecorder()
+    token = _current_profile.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_profile.reset(token)
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage and tag sampled stacks with it while profiling"""
+
+    recorder = _current_profile.get()
+    if recorder is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    # Stage graph threads are only sampled while they run one of this request's stages
+    registered = thread_id in recorder.thread_stages
+    previous = recorder.thread_stages.get(thread_id)
+    recorder.thread_stages[thread_id] = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record_stage(name, (time.perf_counter() - started) * 1000)
+        if registered:
+            recorder.thread_stages[thread_id] = previous
+        else:
+            recorder.thread_stages.pop(thread_id, None)
+
+def cprofile_active() -> bool:
+    """Return True if the current request is traced by cProfile, which only sees this thread"""
+
+    profile = _current_profile.get()
+    return isinstance(profile, RequestProfile) and profile.mode == "cprofile"
+
+def recording() -> bool:
+    """Return True if stages are being recorded for the current request"""
+
+    return _current_profile.get() is not None
+
+def count(name: str, value: float = 1):
+    """Add to a per-request counter (e.g. generated tokens) if stages are being recorded"""
+
+    recorder = _current_profile.get()
+    if recorder is not None:
+        recorder.record_count(name, value)
+
+def record_graph(run):
+    """Attach a stage graph run's timeline and critical path to the current request"""
+
+    recorder = _current_profile.get()
+    if recorder is None:
+        return
+    recorder.graph = {
+        "elapsed_ms": round(run.elapsed_ms, 3),
+        "parallelism": round(run.parallelism, 3),
+        "critical_path": run.critical_path,
+        "timeline": {name: {key: round(ms, 3) for key, ms in times.items()} for name, times in run.timeline.items()}
+    }
@@ -0,0 +1,219 @@
+"""
+Query log and cache warming for Deep Job Seek Mini
+
+QueryLog keeps a compact, decaying count of normalized job descriptions and
+persists it across restarts. After a deploy, CacheWarmer replays the hottest
+logged queries (plus the UI examples) through the pipeline in the background,
+so the embedding, search and summary caches are filled before users arrive.
+The warmer has a wall-clock budget, runs at a bounded duty cycle, and pauses
+while live requests are being served.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from utils import normalize_job_description
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class QueryLog:
+    """Rolling frequency log of normalized job descriptions
+
+    Counts are halved every decay_every records, so old traffic fades out and
+    the log stays bounded at max_entries. With a path, the counts recorded
+    since the last flush are merged into the file under an exclusive lock
+    every flush_every records and on flush(), so pre-fork workers sharing one
+    path add up their counts instead of overwriting each other's.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000,
+                 decay_every: int = 10000, flush_every: int = 50):
+        self.path = path
+        self.max_entries = max_entries
+        self.decay_every = decay_every
+        self.flush_every = flush_every
+        # normalized text -> [count, first seen original text]
+        self._entries: Dict[str, List[Any]] = {}
+        # Counts recorded since the last flush, merged into the file on flush
+        self._pending: Dict[str, List[Any]] = {}
+        self._records = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def record(self, job_description: str):
+        key = normalize_job_description(job_description)
+        if not key:
+            return
+        with self._lock:
+            self._entries.setdefault(key, [0, job_description.strip()])[0] += 1
+            if self.path:
+                self._pending.setdefault(key, [0, job_description.strip()])[0] += 1
+            self._records += 1
+            self._entries = _decayed(self._entries, self._records - 1, self._records, self.decay_every)
+            if len(self._entries) > self.max_entries:
+                self._entries = _pruned(self._entries, self.max_entries)
+            flush = self.path and sum(count for count, _ in self._pending.values()) >= self.flush_every
+        if flush:
+            self.flush()
+
+    def top(self, n: int) -> List[str]:
+        """Return the original text of the n most frequent queries"""
+
+        with self._lock:
+            ranked = sorted(self._entries.values(), key=lambda entry: -entry[0])
+        return [text for _, text in ranked[:n]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load(self):
+        data = self._read()
+        with self._lock:
+            self._entries = {key: list(entry) for key, entry in data.get("queries", {}).items()}
+            self._records = data.get("records", 0)
+
+    def flush(self):
+        """Merge the counts recorded since the last flush into the file"""
+
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        added = sum(count for count, _ in pending.values())
+
+        # Other processes flush to the same path; the lock makes read-merge-write atomic
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            data = self._read()
+            entries = {key: list(entry) for key, entry in data.get("queries", {}).items()}
+            records = data.get("records", 0)
+            for key, (count, text) in pending.items():
+                entries.setdefault(key, [0, text])[0] += count
+            entries = _decayed(entries, records, records + added, self.decay_every)
+            records += added
+            if len(entries) > self.max_entries:
+                entries = _pruned(entries, self.max_entries)
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"records": records, "queries": entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+        with self._lock:
+            # Adopt everyone's merged counts, plus what was recorded during the merge
+            for key, (count, text) in self._pending.items():
+                entries.setdefault(key, [0, text])[0] += count
+                records += count
+            self._entries = entries
+            self._records = records
+
+def _decayed(entries: Dict[str, List[Any]], records_before: int, records_after: int,
+             decay_every: int) -> Dict[str, List[Any]]:
+    # Halve every count once per decay_every boundary crossed
+    halvings = records_after // decay_every - records_before // decay_every
+    if halvings <= 0:
+        return entries
+    return {key: [count >> halvings, text] for key, (count, text) in entries.items() if count >> halvings}
+
+def _pruned(entries: Dict[str, List[Any]], max_entries: int) -> Dict[str, List[Any]]:
+    # Keep the hottest 90% so pruning doesn't run on every new query
+    return dict(sorted(entries.items(), key=lambda item: -item[1][0])[:int(max_entries * 0.9)])
+
+class CacheWarmer:
+    """Replay queries through a warm function within a time and CPU budget
+
+    budget_seconds bounds total wall time. duty_cycle is the share of that
+    time the warmer may spend working: after a query that took t seconds it
+    sleeps t * (1 - duty_cycle) / duty_cycle. While is_busy() returns True
+    (live requests in flight) it waits instead of starting the next query.
+    """
+
+    def __init__(self, warm_fn: Callable[[str], Any], jobs: List[str], budget_seconds: float = 60.0,
+                 duty_cycle: float = 0.5, is_busy: Optional[Callable[[], bool]] = None):
+        self.warm_fn = warm_fn
+        self.jobs = jobs
+        self.budget_seconds = budget_seconds
+        self.duty_cycle = min(max(duty_cycle, 0.01), 1.0)
+        self.is_busy = is_busy or (lambda: False)
+        self.stats = {"queued": len(jobs), "warmed": 0, "failed": 0, "elapsed_s": 0.0, "done": False}
+        self._thread = None
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name="cache-warmer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        deadline = started + self.budget_seconds
+
+        for job_description in self.jobs:
+            while self.is_busy() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            if time.monotonic() >= deadline:
+                break
+
+            work_started = time.monotonic()
+            try:
+                self.warm_fn(job_description)
+                self.stats["warmed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"⚠️ Cache warming failed for a query: {e}")
+            worked = time.monotonic() - work_started
+
+            if self.duty_cycle < 1.0:
+                time.sleep(min(worked * (1 - self.duty_cycle) / self.duty_cycle, max(0.0, deadline - time.monotonic())))
+
+        self.stats["elapsed_s"] = round(time.monotonic() - started, 3)
+        self.stats["done"] = True
+        print(f"🔥 Cache warming: {self.stats['warmed']}/{self.stats['queued']} queries in {self.stats['elapsed_s']}s")
+        return self.stats
@@ -265,4 +265,11 @@ RESUME_DATABASE = [
             }
         ]
     }
-]
\ No newline at end of file
+]
+
+# Sample job descriptions: Gradio examples, cache warming seeds and benchmark traffic
+EXAMPLE_JOBS = [
+    "Senior Python Developer with Flask experience, 5+ years building REST APIs, Docker expertise required",
+    "DevOps Engineer specializing in AWS, Kubernetes, and CI/CD pipelines with 3+ years experience",
+    "Full-Stack Developer proficient in React, Node.js, and PostgreSQL for e-commerce applications"
+]
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Disk-backed resume store for Deep Job Seek Mini
+
+Resumes live in an SQLite file as zlib-compressed JSON Resume documents. Only
+resume ids, per-row offsets and embeddings are kept in memory. The full
+documents behind the top-k search hits are fetched lazily, in one query.
+
+    python resume_store.py migrate --db resumes.db     # from resume_data.py
+    RESUME_STORE=resumes.db python app.py
+    python resume_store.py --bench --resumes 100000
+
+Resume ids are their 0-based positions, so a store can stand in for the
+RESUME_DATABASE list (len, indexing and iteration) wherever positions are used.
+Embeddings are cached next to the store as memory-mapped .npy files, keyed by
+model and store revision, so restarts don't re-embed the corpus.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from experience_index import ExperienceIndex, HighlightIndex, experience_text, tag_text, work_experience
+from tag_filters import TagTaxonomy
+
+# SQLite's default limit on bound parameters is 999
+_FETCH_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    work_count INTEGER NOT NULL,
+    document BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def _compress(resume: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(resume, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+def _decompress(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+class ResumeStore:
+    """SQLite-backed sequence of JSON Resume documents"""
+
+    def __init__(self, path: str, create: bool = False):
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"Resume store {path} does not exist; create it with `python resume_store.py migrate`")
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after fork so workers never share
+        # the master's file handle
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def add_resumes(self, resumes: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """Append resumes in batched transactions and return how many were added"""
+
+        connection = self._connect()
+        next_id = len(self)
+        count = 0
+        batch = []
+        for resume in resumes:
+            batch.append((next_id + count, resume['basics']['name'], len(resume.get('work', [])), _compress(resume)))
+            count += 1
+            if len(batch) >= batch_size:
+                with connection:
+                    connection.executemany("INSERT INTO resumes VALUES (?, ?, ?, ?)", batch)
+                batch = []
+        with connection:
+            if batch:
+                connection.executemany("INSERT INTO resumes VALUES (?, ?, ?, ?)", batch)
+            connection.execute("INSERT INTO meta VALUES ('revision', '1') "
+                                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+        return count
+
+    def revision(self) -> int:
+        """Counter bumped by every write, used to key cached embeddings"""
+
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if position < 0:
+            position += len(self)
+        resumes = self.get_many([position])
+        if not resumes:
+            raise IndexError(position)
+        return resumes[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for _, resume in self.iter_resumes():
+            yield resume
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Fetch and decompress the documents for ids, in the given order
+
+        Unknown ids are skipped; repeated ids are decoded once.
+        """
+
+        unique = sorted({int(i) for i in ids})
+        documents = {}
+        connection = self._connect()
+        for start in range(0, len(unique), _FETCH_CHUNK):
+            chunk = unique[start:start + _FETCH_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for resume_id, blob in connection.execute(
+                    f"SELECT id, document FROM resumes WHERE id IN ({placeholders})", chunk):
+                documents[resume_id] = _decompress(blob)
+        return [documents[int(i)] for i in ids if int(i) in documents]
+
+    def iter_resumes(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """Yield (id, resume) in id order, one batch of rows in memory at a time"""
+
+        connection = self._connect()
+        last_id = -1
+        while True:
+            rows = connection.execute("SELECT id, document FROM resumes WHERE id > ? ORDER BY id LIMIT ?",
+                                      (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for resume_id, blob in rows:
+                yield resume_id, _decompress(blob)
+            last_id = rows[-1][0]
+
+    def experience_offsets(self):
+        """Return (resume_ids, work_indexes): the resume and work entry behind each experience row
+
+        Read from the work_count column, so no document is decompressed.
+        """
+
+        rows = np.array(self._connect().execute("SELECT id, work_count FROM resumes ORDER BY id").fetchall(),
+                        dtype=np.int64).reshape(-1, 2)
+        resume_ids = np.repeat(rows[:, 0], rows[:, 1])
+        starts = np.repeat(np.cumsum(rows[:, 1]) - rows[:, 1], rows[:, 1])
+        return resume_ids, np.arange(len(resume_ids), dtype=np.int64) - starts
+
+class StoredExperiences:
+    """Flattened experiences of a ResumeStore, fetched from disk on access"""
+
+    def __init__(self, store: ResumeStore, resume_ids: np.ndarray, work_indexes: np.ndarray):
+        self.store = store
+        self.resume_ids = resume_ids
+        self.work_indexes = work_indexes
+
+    def __len__(self) -> int:
+        return len(self.resume_ids)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        return self.fetch([row])[0]
+
+    def fetch(self, rows: Sequence[int]) -> List[Dict[str, Any]]:
+        """Return the experiences at rows, reading their resumes in a single query"""
+
+        ids = [int(self.resume_ids[row]) for row in rows]
+        resumes = dict(zip(sorted(set(ids)), self.store.get_many(sorted(set(ids)))))
+        return [work_experience(resumes[resume_id], resumes[resume_id]['work'][int(self.work_indexes[row])])
+                for resume_id, row in zip(ids, rows)]
+
+def _cache_prefix(store: ResumeStore, cache_key: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", cache_key)
+    return f"{store.path}.{slug}.r{store.revision()}"
+
+def build_store_index(store: ResumeStore, embedding_model, highlights: bool = False,
+                      cache_key: Optional[str] = None, batch_size: int = 2048, tags: bool = False) -> ExperienceIndex:
+    """Build an ExperienceIndex whose rows stay on disk until they are search hits
+
+    Experiences are embedded in batches while streaming the store. With a
+    cache_key (identifying the embedding model) the matrices are saved next to
+    the store and memory-mapped on later startups instead of recomputed.
+    """
+
+    resume_ids, work_indexes = store.experience_offsets()
+    experiences = StoredExperiences(store, resume_ids, work_indexes)
+
+    prefix = _cache_prefix(store, cache_key) if cache_key else None
+    names = ("experiences", "highlights", "highlight_offsets") if highlights else ("experiences",)
+    paths = {name: f"{prefix}.{name}.npy" for name in names} if prefix else {}
+
+    matrices = None
+    if paths and all(os.path.exists(path) for path in paths.values()):
+        matrices = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+        # A cache key that doesn't capture every model option could match a different width
+        if len(resume_ids) and matrices["experiences"].shape[1] != np.asarray(embedding_model.encode(["probe"])).shape[1]:
+            matrices = None
+    if matrices is None:
+        matrices = _embed_store(store, embedding_model, highlights, batch_size)
+        for name, path in paths.items():
+            np.save(f"{path}.tmp.npy", matrices[name])
+            os.replace(f"{path}.tmp.npy", path)
+            matrices[name] = np.load(path, mmap_mode="r")
+
+    index = ExperienceIndex(experiences, matrices["experiences"], row_people=resume_ids)
+    if highlights:
+        index.highlights = HighlightIndex(matrices["highlights"], np.asarray(matrices["highlight_offsets"]))
+    if tags:
+        index.taxonomy = TagTaxonomy()
+        index.tags = _store_tags(store, index.taxonomy, cache=cache_key is not None)
+    return index
+
+def _store_tags(store: ResumeStore, taxonomy: TagTaxonomy, cache: bool) -> np.ndarray:
+    # Tags depend on the taxonomy rather than the embedding model
+    path = f"{store.path}.tags-{zlib.crc32(chr(0).join(taxonomy.terms).encode('utf-8')):08x}.r{store.revision()}.npy"
+    if cache and os.path.exists(path):
+        return np.load(path)
+
+    blocks = []
+    texts = []
+    for _, resume in store.iter_resumes():
+        texts.extend(tag_text(work_experience(resume, work)) for work in resume.get('work', []))
+        if len(texts) >= 10000:
+            blocks.append(taxonomy.encode(texts))
+            texts = []
+    blocks.append(taxonomy.encode(texts))
+    tags = np.ascontiguousarray(np.hstack(blocks))
+
+    if cache:
+        np.save(f"{path}.tmp.npy", tags)
+        os.replace(f"{path}.tmp.npy", path)
+    return tags
+
+def _embed_store(store: ResumeStore, embedding_model, highlights: bool, batch_size: int) -> Dict[str, np.ndarray]:
+    experience_blocks, highlight_blocks, highlight_counts = [], [], []
+    texts, highlight_texts = [], []
+
+    def flush():
+        if texts:
+            experience_blocks.append(np.asarray(embedding_model.encode(texts), dtype=np.float32))
+            texts.clear()
+        if highlight_texts:
+            highlight_blocks.append(np.asarray(embedding_model.encode(highlight_texts), dtype=np.float32))
+            highlight_texts.clear()
+
+    for _, resume in store.iter_resumes():
+        for work in resume.get('work', []):
+            exp = work_experience(resume, work)
+            texts.append(experience_text(exp))
+            if highlights:
+                highlight_texts.extend(exp['highlights'])
+                highlight_counts.append(len(exp['highlights']))
+        if len(texts) >= batch_size:
+            flush()
+    flush()
+
+    matrices = {"experiences": np.vstack(experience_blocks) if experience_blocks else np.zeros((0, 0), dtype=np.float32)}
+    if highlights:
+        offsets = np.zeros(len(highlight_counts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(highlight_counts)
+        matrices["highlights"] = np.vstack(highlight_blocks) if highlight_blocks else np.zeros((0, 0), dtype=np.float32)
+        matrices["highlight_offsets"] = offsets
+    return matrices
+
+def migrate(db_path: str, resumes: Optional[Iterable[Dict[str, Any]]] = None) -> ResumeStore:
+    """Create a store at db_path holding resumes (default: resume_data.RESUME_DATABASE)"""
+
+    if resumes is None:
+        from resume_data import RESUME_DATABASE
+        resumes = RESUME_DATABASE
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists")
+    store = ResumeStore(db_path, create=True)
+    store.add_resumes(resumes)
+    return store
+
+def synthetic_resumes(count: int, seed: int = 3) -> Iterator[Dict[str, Any]]:
+    """Yield count resumes varied from the sample database"""
+
+    from resume_data import RESUME_DATABASE
+
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        template = RESUME_DATABASE[i % len(RESUME_DATABASE)]
+        work = []
+        for exp in template['work']:
+            highlights = [str(h) for h in rng.permutation(exp['highlights'])]
+            work.append(dict(exp, name=f"{exp['name']} {i}", highlights=highlights))
+        yield dict(template, basics=dict(template['basics'], name=f"{template['basics']['name']} {i}"), work=work)
+
+def _bench_phase(phase: str, db_path: str, top_k: int = 5) -> Dict[str, Any]:
+    # Runs in a fresh interpreter so RSS reflects this phase alone
+    from backends import HashingEmbedder
+    from memory import current_rss_mb
+
+    embedder = HashingEmbedder()
+    query = embedder.encode(["Senior Python engineer building REST APIs with Docker and Kubernetes"])[0]
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+
+    if phase == "memory":
+        database = [resume for _, resume in ResumeStore(db_path).iter_resumes()]
+        index = ExperienceIndex.build(database, embedder, highlights=True)
+    else:
+        index = build_store_index(ResumeStore(db_path), embedder, highlights=True, cache_key="hashing-384")
+    startup = time.perf_counter() - started
+
+    index.search(query, top_k=top_k, highlights_per_row=3)
+    timings = []
+    for _ in range(50):
+        search_started = time.perf_counter()
+        index.search(query, top_k=top_k, highlights_per_row=3)
+        timings.append((time.perf_counter() - search_started) * 1000)
+
+    return {"startup_s": round(startup, 2), "rss_mb": round(current_rss_mb() - rss_before, 1),
+            "search_ms": round(float(np.median(timings)), 3)}
+
+def benchmark(resumes: int = 100000, db_path: str = None):
+    """Report size, startup time, RSS and search latency for in-memory vs disk-backed data"""
+
+    import tempfile
+
+    workdir = tempfile.mkdtemp(prefix="resume-store-")
+    db_path = db_path or os.path.join(workdir, "resumes.db")
+
+    started = time.perf_counter()
+    json_bytes = 0
+    def counted():
+        nonlocal json_bytes
+        for resume in synthetic_resumes(resumes):
+            json_bytes += len(json.dumps(resume))
+            yield resume
+    migrate(db_path, counted())
+    print(f"Migrated {resumes} resumes in {time.perf_counter() - started:.1f}s: "
+          f"{json_bytes / 1e6:.1f} MB JSON -> {os.path.getsize(db_path) / 1e6:.1f} MB SQLite")
+
+    print(f"\n{'mode':<28} {'startup s':>10} {'RSS +MB':>9} {'search ms':>10}")
+    for label, phase in (("in-memory dicts", "memory"), ("store, first start", "store"), ("store, cached embeddings", "store")):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--_phase", phase, "--db", db_path],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:<28} {result['startup_s']:>10} {result['rss_mb']:>9} {result['search_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Disk-backed resume store")
+    parser.add_argument("command", nargs="?", choices=["migrate"], help="Create a store from resume_data.py")
+    parser.add_argument("--db", default="resumes.db")
+    parser.add_argument("--bench", action="store_true", help="Compare in-memory and disk-backed resumes")
+    parser.add_argument("--resumes", type=int, default=100000)
+    parser.add_argument("--_phase", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._phase:
+        print(json.dumps(_bench_phase(args._phase, args.db)))
+    elif args.bench:
+        benchmark(args.resumes)
+    elif args.command == "migrate":
+        store = migrate(args.db)
+        print(f"✅ Migrated {len(store)} resumes to {args.db}")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-worker HTTP server for Deep Job Seek Mini
+
+The master process loads the models and builds the experience index once, then
+forks workers that share those pages copy-on-write. Each worker serves requests
+from the same listening socket and gets an equal share of the torch threads.
+
+    python server.py --workers 4 --port 8000
+    python server.py --bench --workers 1,2,4,8
+"""
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Forked workers must not inherit a tokenizer thread pool
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import torch
+
+import app
+from memory import log_memory, process_memory_mb
+from profiling import collect_stages, header_requests_profile
+from resume_data import EXAMPLE_JOBS
+
+class ResumeRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /generate {"job_description": ...}, GET /health
+
+    Requests search the shared base database; per-session resumes (tenants.py)
+    are a Gradio feature. Successful responses carry per-stage durations in a
+    Server-Timing header.
+    """
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "pid": os.getpid()})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            job_description = str(payload.get("job_description", ""))
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "Request body must be JSON"})
+            return
+
+        if not job_description.strip():
+            self._send_json(400, {"error": "Please enter a job description."})
+            return
+
+        try:
+            with collect_stages() as recorder:
+                resume = app.build_tailored_resume(job_description, profile=header_requests_profile(self.headers))
+        except Exception as e:
+            self._send_json(500, {"error": f"Error generating resume: {str(e)}"})
+            return
+
+        server_timing = ", ".join(f"{name};dur={elapsed_ms:.3f}" for name, elapsed_ms in recorder.stages.items())
+        self._send_json(200, resume, {"Server-Timing": server_timing})
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def prepare_master():
+    """Load models and build the experience index before any worker is forked"""
+
+    # A single intra-op thread means no OpenMP pool exists at fork time
+    torch.set_num_threads(1)
+
+    embedding_model, _ = app.load_models()
+    app.get_experience_index(embedding_model)
+    if app.WARM_ON_STARTUP:
+        # Warmed caches are inherited by every worker
+        app.start_cache_warmer(background=False)
+
+    # Move everything allocated so far out of the GC's reach so that collections
+    # in the workers don't touch (and un-share) the master's object headers
+    gc.collect()
+    gc.freeze()
+    log_memory("master ready")
+
+def create_listener(host, port, backlog=128):
+    """Create the listening socket shared by all workers"""
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    return listener
+
+def run_worker(listener, threads):
+    """Serve requests from the shared listener until terminated"""
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Leave serve_forever() on SIGTERM so the query log below gets flushed
+    signal.signal(signal.SIGTERM, _exit_worker)
+    torch.set_num_threads(threads)
+
+    # Threads don't survive fork, so the idle reaper has to be restarted here
+    app._idle_reaper = None
+    if app.LOW_MEMORY_MODE:
+        app._start_idle_reaper()
+
+    server = HTTPServer(listener.getsockname(), ResumeRequestHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    finally:
+        # Workers leave through os._exit(), which skips atexit handlers
+        app._query_log.flush()
+
+def _exit_worker(signum, frame):
+    raise SystemExit(0)
+
+def spawn_worker(listener, threads):
+    """Fork a worker process and return its pid"""
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(listener, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+def serve(host="0.0.0.0", port=8000, workers=2, threads=None):
+    """Run the pre-fork master: prepare, fork workers and restart any that die"""
+
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    prepare_master()
+    listener = create_listener(host, port)
+
+    children = set()
+    for _ in range(workers):
+        children.add(spawn_worker(listener, threads))
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers x {threads} torch threads (master pid {os.getpid()})")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+            children.add(spawn_worker(listener, threads))
+
+    listener.close()
+
+def _post_json(url, body, timeout=300):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def _wait_for_health(url, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return json.loads(response.read())
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"Server at {url} did not become healthy within {timeout}s")
+
+def _child_pids(pid):
+    """Return the direct children of a process from procfs"""
+
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        return children
+    except FileNotFoundError:
+        # Kernels without CONFIG_PROC_CHILDREN: match the parent pid in every /proc/<pid>/stat
+        pass
+
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces, so split after its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+def benchmark(worker_counts, requests=100, port=8765):
+    """Measure requests/second and memory per worker for each worker count"""
+
+    results = []
+    for workers in worker_counts:
+        command = [sys.executable, os.path.abspath(__file__), "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+        master = subprocess.Popen(command)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            _wait_for_health(f"{base_url}/health")
+
+            # One warm-up request per worker so lazy allocations are counted
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda job: _post_json(f"{base_url}/generate", {"job_description": job}),
+                              [EXAMPLE_JOBS[i % len(EXAMPLE_JOBS)] for i in range(workers)]))
+
+            jobs = [EXAMPLE_JOBS[i % len(EXAMPLE_JOBS)] for i in range(requests)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+                list(pool.map(lambda job: _post_json(f"{base_url}/generate", {"job_description": job}), jobs))
+            elapsed = time.perf_counter() - start
+
+            worker_memory = [process_memory_mb(pid) for pid in _child_pids(master.pid)]
+            master_memory = process_memory_mb(master.pid)
+            results.append({
+                "workers": workers,
+                "requests_per_second": round(requests / elapsed, 2),
+                "master_rss_mb": master_memory["rss_mb"],
+                "worker_rss_mb": round(sum(m["rss_mb"] for m in worker_memory) / len(worker_memory), 1),
+                "worker_pss_mb": round(sum(m["pss_mb"] for m in worker_memory) / len(worker_memory), 1),
+                "worker_uss_mb": round(sum(m["uss_mb"] for m in worker_memory) / len(worker_memory), 1),
+                "total_pss_mb": round(master_memory["pss_mb"] + sum(m["pss_mb"] for m in worker_memory), 1)
+            })
+        finally:
+            master.send_signal(signal.SIGTERM)
+            master.wait(timeout=60)
+
+    print(f"\n{'workers':>8} {'req/s':>8} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for row in results:
+        print(f"{row['workers']:>8} {row['requests_per_second']:>8} {row['worker_rss_mb']:>11} "
+              f"{row['worker_pss_mb']:>11} {row['worker_uss_mb']:>11} {row['total_pss_mb']:>10}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker server for Deep Job Seek Mini")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", default=None, help="Worker count, or a comma-separated list with --bench")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads per worker (default: CPUs / workers)")
+    parser.add_argument("--bench", action="store_true", help="Report req/s and memory per worker for each worker count")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per benchmark run")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark([int(n) for n in (args.workers or "1,2,4,8").split(",")], requests=args.requests)
+    else:
+        serve(args.host, args.port, int(args.workers or 2), args.threads)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Single-flight coalescing of identical in-flight calls for Deep Job Seek Mini
+
+The first caller for a key runs the function; callers that arrive with the same
+key while it is running wait on the same future instead of repeating the work.
+Nothing is kept once the call finishes, so this is not a cache.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Leader exceptions that mean "this caller went away" rather than "the work failed";
+# waiters retry instead of inheriting them
+_CANCELLATIONS = (CancelledError, asyncio.CancelledError, KeyboardInterrupt, SystemExit, GeneratorExit)
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args,
+           timeout: Optional[float] = None, on_wait: Optional[Callable[[], None]] = None, **kwargs) -> Tuple[Any, bool]:
+        """Run fn(*args, **kwargs) once per key at a time and return (result, shared)
+
+        shared is True when the result was computed by another caller, which
+        also received the same object. timeout bounds how long a waiter blocks;
+        a waiter that times out or is interrupted does not affect the leader or
+        the other waiters. If the leader is cancelled, one waiter takes over.
+        """
+
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                return self._lead(key, future, fn, args, kwargs), False
+
+            if on_wait is not None:
+                on_wait()
+            try:
+                return future.result(timeout=timeout), True
+            except CancelledError:
+                # The leader was cancelled before finishing: try to become the new leader
+                continue
+
+    def _lead(self, key, future, fn, args, kwargs):
+        # The key is released before the future resolves, so a waiter that wakes
+        # up on a cancelled future never finds it again
+        try:
+            result = fn(*args, **kwargs)
+        except _CANCELLATIONS:
+            self._release(key, future)
+            future.cancel()
+            raise
+        except BaseException as e:
+            self._release(key, future)
+            future.set_exception(e)
+            raise
+        self._release(key, future)
+        future.set_result(result)
+        return result
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return leader, coalesced and in-flight counters"""
+
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,184 @@
+"""
+Stage graph execution for Deep Job Seek Mini
+
+A request pipeline is declared as named stages with dependencies. Stages whose
+dependencies are done run concurrently on a shared thread pool, so independent
+work (retrieval and summary generation) overlaps and request latency follows
+the longest dependency chain instead of the sum of all stages.
+
+Stages that run torch models take one of a fixed number of torch slots first.
+The process's torch thread budget (torch.get_num_threads(): every core when
+run alone, the worker's share under server.py) is split between the slots, so
+overlapping torch stages never use more threads than the process was given.
+By default there is one slot per torch stage a request can overlap (retrieval
+and generation), capped at the thread budget; a one-thread worker runs its
+torch stages one at a time.
+
+Every run records when each stage waited, started and finished, and the
+critical path: the chain of stages that determined the end-to-end latency.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+class StageExecutor:
+    """Thread pool plus torch slots shared by every graph run in the process
+
+    On start the process's torch threads are divided between the slots
+    (torch.set_num_threads(budget // slots)).
+    """
+
+    def __init__(self, max_workers: int = 4, torch_slots: int = 0):
+        self.max_workers = max_workers
+        self.torch_slots = torch_slots
+        self.slots = 0
+        self.threads_per_slot = 0
+        self._pool = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Created on first use in each process: a pool started in a pre-fork
+        # master (cache warming) has no threads in the forked workers
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                budget = torch_thread_budget()
+                self.slots = self.torch_slots or default_torch_slots(budget)
+                self.threads_per_slot = max(1, budget // self.slots)
+                if self.threads_per_slot != budget:
+                    import torch
+                    torch.set_num_threads(self.threads_per_slot)
+                self._slots = threading.BoundedSemaphore(self.slots)
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+                self._pid = os.getpid()
+        return self._pool, self._slots
+
+def torch_thread_budget() -> int:
+    """Intra-op threads this process may use (1 without torch)"""
+
+    try:
+        import torch
+    except ImportError:
+        return 1
+    return max(1, torch.get_num_threads())
+
+def default_torch_slots(budget: int, torch_stages: int = 2) -> int:
+    """Torch stages of one request that may run at once within a thread budget"""
+
+    return max(1, min(torch_stages, budget))
+
+class GraphRun:
+    """Results and timeline of one graph run"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        # name -> {"wait_ms", "start_ms", "end_ms"} relative to the run start
+        self.timeline: Dict[str, Dict[str, float]] = {}
+        self.critical_path: List[str] = []
+        self.elapsed_ms = 0.0
+
+    @property
+    def parallelism(self) -> float:
+        """Sum of stage run times over wall time (1.0 means fully sequential)"""
+
+        busy = sum(t["end_ms"] - t["start_ms"] for t in self.timeline.values())
+        return busy / self.elapsed_ms if self.elapsed_ms else 0.0
+
+class StageGraph:
+    """Named stages with dependencies, run in dependency order"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (), uses_torch: bool = False):
+        """Add a stage; fn is called with the results of deps, in order"""
+
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = {"fn": fn, "deps": tuple(deps), "uses_torch": uses_torch}
+        return self
+
+    def run(self, executor: Optional[StageExecutor] = None) -> GraphRun:
+        """Run every stage and return a GraphRun
+
+        Without an executor stages run one after another in the calling thread.
+        Stages see the caller's context variables, so profiling stages inside
+        them are recorded against the caller's request.
+        """
+
+        run = GraphRun()
+        started = time.perf_counter()
+
+        if executor is None:
+            for name, spec in self._stages.items():
+                self._run_stage(run, name, spec, started, None, time.perf_counter())
+        else:
+            self._run_concurrent(run, executor, started)
+
+        run.elapsed_ms = (time.perf_counter() - started) * 1000
+        run.critical_path = self._critical_path(run)
+        return run
+
+    def _run_concurrent(self, run: GraphRun, executor: StageExecutor, started: float):
+        pool, slots = executor._ensure_started()
+        pending = dict(self._stages)
+        running = {}
+
+        try:
+            while pending or running:
+                for name in [n for n, spec in pending.items() if all(d in run.results for d in spec["deps"])]:
+                    spec = pending.pop(name)
+                    context = contextvars.copy_context()
+                    future = pool.submit(context.run, self._run_stage, run, name, spec, started,
+                                         slots, time.perf_counter())
+                    running[future] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    # Re-raises the first stage failure in the caller
+                    future.result()
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _run_stage(self, run: GraphRun, name: str, spec: Dict[str, Any], started: float,
+                   slots: Optional[threading.BoundedSemaphore], queued_at: float):
+        args = [run.results[dep] for dep in spec["deps"]]
+        use_slot = slots is not None and spec["uses_torch"]
+        if use_slot:
+            slots.acquire()
+        try:
+            stage_started = time.perf_counter()
+            result = spec["fn"](*args)
+            stage_finished = time.perf_counter()
+        finally:
+            if use_slot:
+                slots.release()
+
+        run.timeline[name] = {
+            "wait_ms": (stage_started - queued_at) * 1000,
+            "start_ms": (stage_started - started) * 1000,
+            "end_ms": (stage_finished - started) * 1000
+        }
+        run.results[name] = result
+        return result
+
+    def _critical_path(self, run: GraphRun) -> List[str]:
+        # Walk back from the last stage to finish through the dependency that
+        # finished last, which is the one that held each stage back
+        if not run.timeline:
+            return []
+        name = max(run.timeline, key=lambda n: run.timeline[n]["end_ms"])
+        path = [name]
+        while self._stages[name]["deps"]:
+            name = max(self._stages[name]["deps"], key=lambda n: run.timeline[n]["end_ms"])
+            path.append(name)
+        path.reverse()
+        return path
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Bitset requirement filters for Deep Job Seek Mini
+
+Every experience is tagged at index time with the terms of the requirement
+taxonomy (utils.TECH_KEYWORDS) it mentions. Tags are packed into uint64 words
+stored word-major, shape (words, rows), so each word is one contiguous array.
+Must-have, must-not-have and any-of filters become a handful of vectorized
+AND/compare operations over just the words their terms fall in, and the
+resulting row mask is applied before scoring.
+
+    python tag_filters.py --bench --rows 2000000 --terms 512
+"""
+
+import argparse
+import re
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import TECH_KEYWORDS
+
+class TagTaxonomy:
+    """Ordered taxonomy terms, each owning one bit"""
+
+    def __init__(self, terms: Sequence[str] = TECH_KEYWORDS):
+        self.terms = [term.lower() for term in terms]
+        self.bit = {term: i for i, term in enumerate(self.terms)}
+        self.words = max(1, (len(self.terms) + 63) // 64)
+        # Longest terms first so "machine learning" wins over a shorter overlap;
+        # term boundaries allow symbols like c++ and ci/cd
+        alternation = "|".join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<![a-z0-9+#])(?:{alternation})(?![a-z0-9+#])")
+
+    def terms_in(self, text: str) -> List[str]:
+        """Return the taxonomy terms mentioned in text, as whole words"""
+
+        return sorted(set(self._pattern.findall(text.lower())))
+
+    def mask(self, terms: Iterable[str]) -> np.ndarray:
+        """Pack terms into a (words,) uint64 mask; unknown terms raise KeyError"""
+
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for term in terms:
+            bit = self.bit[term.lower()]
+            mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        """Tag each text and return a (words, len(texts)) uint64 bitset matrix"""
+
+        rows = [self.mask(self.terms_in(text)) for text in texts]
+        if not rows:
+            return np.zeros((self.words, 0), dtype=np.uint64)
+        return np.ascontiguousarray(np.vstack(rows).T)
+
+class TagFilter:
+    """Must-have, must-not-have and any-of constraints over taxonomy terms"""
+
+    def __init__(self, must: Iterable[str] = (), must_not: Iterable[str] = (), any_of: Iterable[str] = ()):
+        self.must = tuple(sorted({term.lower() for term in must}))
+        self.must_not = tuple(sorted({term.lower() for term in must_not}))
+        self.any_of = tuple(sorted({term.lower() for term in any_of}))
+
+    def __bool__(self) -> bool:
+        return bool(self.must or self.must_not or self.any_of)
+
+    def key(self) -> Tuple[Tuple[str, ...], ...]:
+        """Hashable identity, for cache keys"""
+
+        return self.must, self.must_not, self.any_of
+
+    def __repr__(self) -> str:
+        return f"TagFilter(must={list(self.must)}, must_not={list(self.must_not)}, any_of={list(self.any_of)})"
+
+    def rows(self, tags: np.ndarray, taxonomy: TagTaxonomy) -> Optional[np.ndarray]:
+        """Return a bool mask of the rows that pass, or None when nothing is constrained"""
+
+        if not self:
+            return None
+
+        allowed = np.ones(tags.shape[1], dtype=bool)
+        # Only the words a constraint touches are read
+        for terms, mode in ((self.must, "all"), (self.any_of, "any"), (self.must_not, "none")):
+            if not terms:
+                continue
+            mask = taxonomy.mask(terms)
+            words = np.flatnonzero(mask)
+            if mode == "all":
+                for w in words:
+                    allowed &= (tags[w] & mask[w]) == mask[w]
+            elif mode == "any":
+                hit = np.zeros_like(allowed)
+                for w in words:
+                    hit |= (tags[w] & mask[w]) != 0
+                allowed &= hit
+            else:
+                for w in words:
+                    allowed &= (tags[w] & mask[w]) == 0
+        return allowed
+
+# Taxonomy terms that are also everyday words ("go-to-market", "a spring
+# launch"); they only count as hard requirements in these technical forms
+AMBIGUOUS_TERMS = {
+    "go": re.compile(r"(?<![a-z0-9+#-])go(?:lang|\s+(?:language|programming|developer|engineer|services?))\b"),
+    "rest": re.compile(r"(?<![a-z0-9+#-])rest(?:ful)?\s*(?:apis?|services?|endpoints?)\b"),
+    "express": re.compile(r"(?<![a-z0-9+#-])express(?:\.?js\b|\s+(?:framework|server)\b)"),
+    "spring": re.compile(r"(?<![a-z0-9+#-])spring\s+(?:boot|framework|cloud|mvc)\b")
+}
+
+_SENTENCES = re.compile(r"[;!?\n]|\.(?=\s|$)")
+# "Requires X", "must have X", "Required skills: X, Y" (terms follow the marker)
+_LEADING = re.compile(r"\b(?:requires?\b|must[- ]have|must know|must be (?:proficient|experienced|skilled|fluent) (?:in|with)"
+                      r"|(?:required|mandatory|essential)\s*(?:skills?|experience|qualifications?|knowledge)?\s*:)")
+# "X required", "X experience is mandatory", "X is a must" (terms precede the marker)
+_TRAILING = re.compile(r"\b(?:required|mandatory|essential|a must)\b")
+# Words that end a requirement's scope: it stops applying after them
+_SOFT = re.compile(r"\b(?:but|however|although|though|whereas|while|nice to have|ideally)\b")
+_NEGATION = re.compile(r"\b(?:not|no|never|without|neither|nor)\b|n't\b")
+# Qualifiers that make the terms before them optional ("Java preferred") and
+# alternatives ("Python or Java"), where no single term is a must-have
+_OPTIONAL = re.compile(r"\b(?:preferred|a plus|bonus|optional|or|either)\b")
+
+def hard_requirements(job_description: str, taxonomy: TagTaxonomy) -> TagFilter:
+    """Return a must-have filter for taxonomy terms the posting says are required
+
+    Only terms inside a required/must-have phrase count, so "Kubernetes is not
+    required" or "Python required, Go preferred" do not exclude candidates for
+    the negated or optional terms. Everyday-word terms (AMBIGUOUS_TERMS) count
+    only in their technical form ("Spring Boot", "REST APIs").
+    """
+
+    must = []
+    for sentence in _SENTENCES.split(job_description.lower()):
+        leading = list(_LEADING.finditer(sentence))
+        for match in leading:
+            # A negated marker ("does not require") applies to nothing
+            if _NEGATION.search(sentence[:match.start()].rsplit(",", 1)[-1]):
+                continue
+            # The listed terms run until a negated, optional or contrasting segment
+            for segment in re.split(r",|\band\b", sentence[match.end():]):
+                cut = min((m.start() for m in (_SOFT.search(segment), _NEGATION.search(segment)) if m),
+                          default=None)
+                if not _OPTIONAL.search(segment[:cut]):
+                    must.extend(_confirmed_terms(segment[:cut], taxonomy))
+                if cut is not None:
+                    break
+
+        consumed = [match.span() for match in leading]
+        for match in _TRAILING.finditer(sentence):
+            if any(start <= match.start() < end for start, end in consumed):
+                continue
+            # The terms are the ones since the last comma, soft word or marker
+            scope = sentence[:match.start()].rsplit(",", 1)[-1]
+            scope = _SOFT.split(scope)[-1]
+            scope = _TRAILING.split(scope)[-1]
+            if _NEGATION.search(scope) or _OPTIONAL.search(scope):
+                continue
+            must.extend(_confirmed_terms(scope, taxonomy))
+    return TagFilter(must=must)
+
+def _confirmed_terms(text: str, taxonomy: TagTaxonomy) -> List[str]:
+    return [term for term in taxonomy.terms_in(text)
+            if term not in AMBIGUOUS_TERMS or AMBIGUOUS_TERMS[term].search(text)]
+
+def benchmark(rows: int = 2_000_000, terms: int = 512, density: float = 0.02, seed: int = 0):
+    """Time filter evaluation on random tags"""
+
+    rng = np.random.default_rng(seed)
+    taxonomy = TagTaxonomy([f"term{i}" for i in range(terms)])
+    # Random bitsets with roughly `density` of the bits set
+    tags = np.zeros((taxonomy.words, rows), dtype=np.uint64)
+    for _ in range(max(1, int(density * 64))):
+        tags |= np.uint64(1) << rng.integers(0, 64, tags.shape, dtype=np.uint64)
+    print(f"Rows: {rows}  terms: {terms}  tag matrix: {tags.nbytes / 1e6:.1f} MB")
+
+    filters = {
+        "must x2": TagFilter(must=["term3", "term200"]),
+        "must-not x3": TagFilter(must_not=["term10", "term70", "term400"]),
+        "any-of x8": TagFilter(any_of=[f"term{i * 60}" for i in range(8)]),
+        "mixed": TagFilter(must=["term3"], must_not=["term70"], any_of=["term200", "term300", "term450"])
+    }
+    for name, tag_filter in filters.items():
+        tag_filter.rows(tags, taxonomy)
+        started = time.perf_counter()
+        for _ in range(10):
+            allowed = tag_filter.rows(tags, taxonomy)
+        elapsed = (time.perf_counter() - started) / 10 * 1000
+        print(f"{name:<12} {elapsed:8.2f} ms  {int(allowed.sum())} rows pass")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bitset requirement filters")
+    parser.add_argument("--bench", action="store_true", help="Time filters on random tags")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--terms", type=int, default=512)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.rows, args.terms)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
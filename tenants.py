@@ -0,0 +1,166 @@
+"""
+Per-session resume databases for Deep Job Seek Mini
+
+Every tenant (a Gradio session) sees the shared base RESUME_DATABASE with its
+own replacements and additions on top. Tenant state lives in the process that
+received it, so the pre-fork JSON API (server.py) serves the base database only.
+Tenants without changes search the shared base index directly. A tenant with
+changes gets a TenantIndex: the shared base index with the replaced people
+masked out, plus a small overlay index over the tenant's own resumes. Tenant
+indexes are built lazily and kept in an LRU bounded by count and bytes.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from compression import top_indices
+from experience_index import ExperienceIndex
+from tag_filters import TagFilter
+
+class TenantIndex:
+    """Shared base index minus replaced people, plus the tenant's own rows"""
+
+    def __init__(self, base: ExperienceIndex, excluded: Optional[np.ndarray], overlay: ExperienceIndex,
+                 overlay_bytes: int = 0):
+        self.base = base
+        self.excluded = excluded
+        self.overlay = overlay
+        # Base rows are shared and not counted
+        self.nbytes = overlay.nbytes + (excluded.nbytes if excluded is not None else 0) + overlay_bytes
+
+    def __len__(self) -> int:
+        excluded = int(self.excluded.sum()) if self.excluded is not None else 0
+        return len(self.base) - excluded + len(self.overlay)
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5, highlights_per_row: int = 0,
+               tag_filter: Optional[TagFilter] = None) -> List[Dict[str, Any]]:
+        """Return the top_k experiences across the visible base rows and the overlay"""
+
+        allowed = self.base.filter_rows(tag_filter)
+        if self.excluded is not None:
+            allowed = ~self.excluded if allowed is None else allowed & ~self.excluded
+        base_rows, base_scores = self.base.top_rows(query_embedding, top_k, allowed)
+        overlay_rows, overlay_scores = self.overlay.top_rows(query_embedding, top_k, self.overlay.filter_rows(tag_filter))
+
+        candidates = self.base.rows_to_experiences(query_embedding, base_rows, highlights_per_row) + \
+            self.overlay.rows_to_experiences(query_embedding, overlay_rows, highlights_per_row)
+        order = top_indices(np.concatenate([base_scores, overlay_scores]), top_k)
+        return [candidates[i] for i in order]
+
+class TenantStore:
+    """Tenant resume overrides plus an LRU of lazily built tenant indexes"""
+
+    def __init__(self, base_database: List[Dict[str, Any]], max_indexes: int = 256,
+                 max_index_bytes: int = 256 * 1024 * 1024, max_tenants: int = 10000):
+        self.base_database = base_database
+        self.max_indexes = max_indexes
+        self.max_index_bytes = max_index_bytes
+        self.max_tenants = max_tenants
+        # tenant_id -> {"resumes": {position: resume}, "version": int}, least recently used first
+        self._tenants = OrderedDict()
+        # tenant_id -> (version, base index, TenantIndex), least recently used first
+        self._indexes = OrderedDict()
+        self._index_bytes = 0
+        self._evictions = 0
+        # Versions come from one store-wide counter, so a tenant recreated after
+        # eviction never reuses a (tenant, version) pair that keys cached results
+        self._last_version = 0
+        self._lock = threading.Lock()
+
+    def replace_resume(self, tenant_id: str, position: int, resume: Dict[str, Any]) -> int:
+        """Replace (or, past the end of the base database, add) one resume for a tenant"""
+
+        with self._lock:
+            tenant = self._tenants.pop(tenant_id, None) or {"resumes": {}, "version": 0}
+            tenant["resumes"][position] = resume
+            self._last_version += 1
+            tenant["version"] = self._last_version
+            self._tenants[tenant_id] = tenant
+            self._drop_index(tenant_id)
+
+            while len(self._tenants) > self.max_tenants:
+                evicted, _ = self._tenants.popitem(last=False)
+                self._drop_index(evicted)
+
+            return tenant["version"]
+
+    def version(self, tenant_id: Optional[str]) -> int:
+        """Return the tenant's database version (0 while it matches the base, never reused otherwise)"""
+
+        tenant = self._tenants.get(tenant_id)
+        return tenant["version"] if tenant else 0
+
+    def index(self, tenant_id: Optional[str], base_index: ExperienceIndex, embedding_model):
+        """Return the index a tenant searches, building its TenantIndex on first use"""
+
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if not tenant:
+                return base_index
+            self._tenants.move_to_end(tenant_id)
+
+            cached = self._indexes.get(tenant_id)
+            if cached and cached[0] == tenant["version"] and cached[1] is base_index:
+                self._indexes.move_to_end(tenant_id)
+                return cached[2]
+
+            version = tenant["version"]
+            resumes = dict(tenant["resumes"])
+
+        # Embed the tenant's rows outside the lock so other tenants aren't blocked
+        index = self._build(resumes, base_index, embedding_model)
+
+        with self._lock:
+            if self.version(tenant_id) == version:
+                self._drop_index(tenant_id)
+                self._indexes[tenant_id] = (version, base_index, index)
+                self._index_bytes += index.nbytes
+                self._evict()
+        return index
+
+    def _build(self, resumes: Dict[int, Dict[str, Any]], base_index: ExperienceIndex, embedding_model) -> TenantIndex:
+        replaced = {position for position in resumes if position < len(self.base_database)}
+
+        excluded = None
+        if replaced and isinstance(base_index.row_people, np.ndarray):
+            # One person per row (disk-backed store)
+            excluded = np.isin(base_index.row_people, sorted(replaced))
+        elif replaced and len(base_index):
+            # Dedup only merges one person's entries, so every row belongs to a
+            # single person and is hidden exactly when that person is replaced
+            excluded = np.fromiter((set(people) <= replaced for people in base_index.row_people),
+                                   dtype=bool, count=len(base_index))
+
+        ordered = [resume for _, resume in sorted(resumes.items())]
+        overlay = ExperienceIndex.build(ordered, embedding_model, highlights=base_index.highlights is not None,
+                                        tags=base_index.tags is not None)
+        overlay_bytes = len(json.dumps(ordered))
+        return TenantIndex(base_index, excluded, overlay, overlay_bytes)
+
+    def _drop_index(self, tenant_id: str):
+        cached = self._indexes.pop(tenant_id, None)
+        if cached:
+            self._index_bytes -= cached[2].nbytes
+
+    def _evict(self):
+        # The most recently inserted index is always kept
+        while len(self._indexes) > 1 and (len(self._indexes) > self.max_indexes or
+                                          self._index_bytes > self.max_index_bytes):
+            tenant_id, _ = next(iter(self._indexes.items()))
+            self._drop_index(tenant_id)
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return tenant and index cache counters"""
+
+        with self._lock:
+            return {
+                "tenants": len(self._tenants),
+                "cached_indexes": len(self._indexes),
+                "cached_index_bytes": self._index_bytes,
+                "index_evictions": self._evictions
+            }
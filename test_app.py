@@ -3,9 +3,64 @@
 Simple test script for Deep Job Seek Mini
 """
 
+import contextlib
+import copy
+import gc
+import gzip
 import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import weakref
+import urllib.request
+from http.server import HTTPServer
+import numpy as np
+from batching import BucketedEncoder
+from backends import EMBEDDING_BACKENDS, HashingEmbedder, count_new_tokens, first_sentence_stopping, load_backend, register_embedding_backend, resolve_config, summary_generation_kwargs
+from compression import CompressedEmbeddings, recall_at_k, synthetic_embeddings
+from dedup import deduplicate_experiences
+from experience_index import ExperienceIndex, HighlightIndex, experience_text, flatten_experiences
+from export import export_resumes
+from loadtest import run_load, summarize
+import profiling
+from querycache import CacheWarmer, LRUCache, QueryLog
+from singleflight import SingleFlight
+from tag_filters import TagFilter, TagTaxonomy, hard_requirements
+from stagegraph import StageExecutor, StageGraph, default_torch_slots
+from tenants import TenantStore
 from resume_data import RESUME_DATABASE
-from utils import extract_key_requirements, build_resume_json
+from resume_store import build_store_index, migrate
+from memory import memory_report
+from utils import extract_key_requirements, build_resume_json, format_resume_for_display
+
+OFFLINE_BACKENDS = {"EMBEDDING_BACKEND": "hashing", "GENERATOR_BACKEND": "template"}
+
+@contextlib.contextmanager
+def offline_app(app):
+    """Point app at the hashing/template backends with empty caches, restoring both afterwards"""
+    
+    saved_env = {key: os.environ.get(key) for key in OFFLINE_BACKENDS}
+    saved_state = (app._models_cache, app._experience_index, dict(app._backend_reports),
+                   app._embedding_cache, app._search_cache, app._summary_cache)
+    os.environ.update(OFFLINE_BACKENDS)
+    app._models_cache, app._experience_index = None, None
+    app._embedding_cache, app._search_cache, app._summary_cache = LRUCache(), LRUCache(), LRUCache()
+    try:
+        yield
+    finally:
+        app._models_cache, app._experience_index = saved_state[:2]
+        app._embedding_cache, app._search_cache, app._summary_cache = saved_state[3:]
+        app._backend_reports.clear()
+        app._backend_reports.update(saved_state[2])
+        for key, value in saved_env.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
 
 def test_resume_data():
     """Test that resume data is properly formatted"""
@@ -88,6 +143,810 @@ def test_resume_building():
     print("✅ Resume building works")
     print(f"Sample resume structure: {list(resume.keys())}")
 
+def test_memory_report():
+    """Test RSS reporting"""
+    print("\n🧪 Testing memory report...")
+    
+    report = memory_report()
+    
+    assert report["rss_mb"] > 0, "Current RSS should be positive"
+    assert report["peak_rss_mb"] >= report["rss_mb"], "Peak RSS should not be below current RSS"
+    
+    print(f"✅ Memory report works: {report}")
+
+def test_experience_index():
+    """Test experience index build and search"""
+    print("\n🧪 Testing experience index...")
+    
+    embedder = HashingEmbedder()
+    index = ExperienceIndex.build(RESUME_DATABASE, embedder)
+    
+    expected_rows = sum(len(person["work"]) for person in RESUME_DATABASE)
+    assert len(index) == expected_rows, "Every work entry should be indexed"
+    assert index.embeddings.shape[0] == expected_rows
+    
+    query = embedder.encode(["Kubernetes clusters AWS infrastructure"])[0]
+    results = index.search(query, top_k=3)
+    
+    assert len(results) == 3
+    assert results[0]["company"] == "CloudTech Solutions", f"Unexpected top hit: {results[0]['company']}"
+    
+    print("✅ Experience index works")
+
+def test_highlight_selection():
+    """Test vectorized per-experience highlight ranking"""
+    print("\n🧪 Testing highlight selection...")
+    
+    embedder = HashingEmbedder()
+    index = ExperienceIndex.build(RESUME_DATABASE, embedder, highlights=True)
+    query = embedder.encode(["Kubernetes clusters AWS infrastructure"])[0]
+    
+    for exp in index.search(query, top_k=5, highlights_per_row=2):
+        source = next(e for e in index.experiences if e["company"] == exp["company"] and e["position"] == exp["position"])
+        expected = sorted(source["highlights"], key=lambda h: -float(embedder.encode([h])[0] @ query))[:2]
+        assert exp["highlights"] == expected, f"Highlights should be ranked by relevance: {exp['highlights']}"
+    assert index.search(query, top_k=1)[0]["highlights"] == index.experiences[index.top_rows(query, 1)[0][0]]["highlights"]
+    
+    # Segmented top-k matches a per-row sort, including empty and short rows
+    rng = np.random.default_rng(0)
+    counts = [4, 0, 1, 6, 3]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    highlights = HighlightIndex(rng.standard_normal((offsets[-1], 8)).astype(np.float32), offsets)
+    q = rng.standard_normal(8).astype(np.float32)
+    rows = np.array([3, 1, 0, 2, 4])
+    for row, positions in zip(rows, highlights.select(q, rows, per_row=3)):
+        naive = np.argsort(-(highlights.embeddings[offsets[row]:offsets[row + 1]] @ q))[:3]
+        assert positions.tolist() == naive.tolist()
+    
+    print("✅ Highlight selection works")
+
+def test_requirement_filters():
+    """Test bitset requirement tags and must/must-not/any-of filters"""
+    print("\n🧪 Testing requirement filters...")
+    
+    taxonomy = TagTaxonomy()
+    assert taxonomy.terms_in("Go and C++ at Google, JavaScript CI/CD") == ["c++", "ci/cd", "go", "javascript"]
+    assert hard_requirements("Python developer, Docker and Kubernetes required. AWS a plus", taxonomy).must == ("docker", "kubernetes")
+    assert hard_requirements("Required skills: Python, Django. Docker is a must", taxonomy).must == ("django", "docker", "python")
+    
+    # Negated, optional and alternative terms are not must-haves
+    for posting in ("Kubernetes experience is not required", "No Kubernetes experience required",
+                    "Kubernetes isn't required", "Does not require Kubernetes", "Kubernetes or AWS required",
+                    "Must have Python, Kubernetes preferred", "Requires Python but not Kubernetes"):
+        assert "kubernetes" not in hard_requirements(posting, taxonomy).must, posting
+    assert hard_requirements("Requires Python but not Kubernetes", taxonomy).must == ("python",)
+    
+    # Everyday words count only in their technical form
+    assert not hard_requirements("Go-to-market experience required. Must have rest, express and spring energy", taxonomy)
+    assert hard_requirements("Spring Boot and REST APIs required, Express.js required, Go language essential",
+                             taxonomy).must == ("express", "go", "rest", "spring")
+    
+    # More than 64 terms spans several uint64 words
+    terms = [f"skill{i}" for i in range(150)]
+    wide = TagTaxonomy(terms)
+    rng = np.random.default_rng(1)
+    row_terms = [set(rng.choice(terms, size=6, replace=False)) for _ in range(500)]
+    tags = wide.encode(" ".join(row) for row in row_terms)
+    assert tags.shape == (3, 500)
+    
+    tag_filter = TagFilter(must=["skill1"], must_not=["skill140"], any_of=["skill70", "skill2", "skill99"])
+    expected = [("skill1" in row and "skill140" not in row and bool(row & {"skill70", "skill2", "skill99"}))
+                for row in row_terms]
+    assert tag_filter.rows(tags, wide).tolist() == expected
+    
+    embedder = HashingEmbedder()
+    index = ExperienceIndex.build(RESUME_DATABASE, embedder, tags=True)
+    query = embedder.encode(["Backend engineer building APIs"])[0]
+    hits = index.search(query, top_k=5, tag_filter=TagFilter(must=["kubernetes"]))
+    
+    # Only allowed rows are scored, and rows map back to their index positions
+    for every in (2, 7):  # dense and sparse filters
+        allowed = np.arange(len(index)) % every == 0
+        rows, scores = index.top_rows(query, 2, allowed)
+        assert allowed[rows].all() and np.allclose(scores, index.scores(query)[rows])
+        assert rows.tolist() == [r for r in np.argsort(-index.scores(query), kind="stable") if allowed[r]][:2]
+    assert hits and all("kubernetes" in taxonomy.terms_in(experience_text(hit) + " " + " ".join(hit["skills"])) for hit in hits)
+    
+    # The app reads must-haves from the raw posting, whose line breaks end clauses,
+    # and postings that normalize alike but filter differently are cached apart
+    import app
+    
+    posting = "Backend Engineer\nNice to have: Python\nKubernetes required"
+    assert hard_requirements(posting, taxonomy).must == ("kubernetes",)
+    assert hard_requirements(" ".join(posting.split()), taxonomy).must != ("kubernetes",)
+    with offline_app(app):
+        embedding_model, _ = app.load_models()
+        for text in (posting, " ".join(posting.split())):
+            app.find_relevant_experience(text, embedding_model)
+        assert len(app._search_cache) == 2, "The requirement filter should be part of the search cache key"
+        app_hits = app.find_relevant_experience(posting, embedding_model)
+    assert app_hits and "kubernetes" in taxonomy.terms_in(experience_text(app_hits[0]) + " " + " ".join(app_hits[0]["skills"]))
+    
+    print(f"✅ Requirement filters work: {len(hits)} Kubernetes experiences")
+
+def test_compressed_index():
+    """Test reduced-dimension float16/int8 index storage"""
+    print("\n🧪 Testing compressed index...")
+    
+    data = synthetic_embeddings(2050)
+    full, queries = data[:2000], data[2000:]
+    for dtype in ("float16", "int8"):
+        compressed = CompressedEmbeddings.fit(full, dims=128, dtype=dtype, keep_full=True)
+        assert compressed.codes.nbytes * 4 <= full.nbytes, "Codes should be at least 4x smaller"
+        recall = recall_at_k(full, compressed, queries, ks=(10,))
+        assert recall[10] >= 0.9, f"{dtype} recall@10 too low: {recall}"
+        assert recall_at_k(full, compressed, queries, ks=(10,), rerank=50)[10] == 1.0
+    
+    embedder = HashingEmbedder()
+    index = ExperienceIndex.build(RESUME_DATABASE, embedder).compress(dims=8, dtype="int8", rerank=5)
+    query = embedder.encode(["Kubernetes clusters AWS infrastructure"])[0]
+    assert index.search(query, top_k=1)[0]["company"] == "CloudTech Solutions"
+    
+    print(f"✅ Compressed index works: {recall}")
+
+def test_near_duplicate_detection():
+    """Test near-duplicate experiences collapse into canonical rows"""
+    print("\n🧪 Testing near-duplicate detection...")
+    
+    experiences = flatten_experiences(RESUME_DATABASE)
+    reworded = dict(experiences[0])
+    reworded["summary"] = reworded["summary"].replace("Developed", "Built")
+    reworded["highlights"] = [highlight.upper() for highlight in reworded["highlights"]]
+    experiences.append(reworded)
+    
+    texts = [experience_text(exp) for exp in experiences]
+    embeddings = HashingEmbedder().encode(texts)
+    canonical, canonical_embeddings, stats = deduplicate_experiences(experiences, texts, embeddings)
+    
+    assert stats["rows_before"] == len(experiences)
+    assert stats["rows_after"] == len(experiences) - 1, f"Expected one row collapsed, got {stats}"
+    assert len(canonical_embeddings) == len(canonical)
+    
+    merged = [row for row in canonical if len(row["sources"]) > 1]
+    assert len(merged) == 1
+    assert merged[0]["highlights"] == experiences[0]["highlights"], "Near-identical highlights should collapse"
+    
+    # The same entry on another person's resume is never merged into theirs
+    copied = dict(experiences[0], person="Someone Else", skills=["Cobol"])
+    canonical, _, _ = deduplicate_experiences(experiences[:1] + [copied], texts[:1] * 2, embeddings[[0, 0]])
+    assert len(canonical) == 2 and all(len(row["sources"]) == 1 for row in canonical)
+    assert "Cobol" not in canonical[0]["skills"]
+    
+    print(f"✅ Near-duplicate detection works: {stats}")
+
+def test_tenant_isolation():
+    """Test per-tenant resume databases over a shared base index"""
+    print("\n🧪 Testing tenant isolation...")
+    
+    embedder = HashingEmbedder()
+    base_index = ExperienceIndex.build(RESUME_DATABASE, embedder)
+    store = TenantStore(RESUME_DATABASE, max_indexes=2)
+    
+    replacement = {
+        "basics": {"name": "Tenant Candidate", "email": "tenant@example.com"},
+        "work": [{"name": "Quantum Widgets", "position": "Quantum Widget Engineer",
+                  "summary": "Calibrated quantum widgets", "highlights": ["Quantum widget calibration"]}],
+        "skills": ["Quantum"]
+    }
+    store.replace_resume("alice", 0, replacement)
+    
+    query = embedder.encode(["Quantum widget calibration engineer"])[0]
+    alice_hits = store.index("alice", base_index, embedder).search(query, top_k=3)
+    bob_hits = store.index("bob", base_index, embedder).search(query, top_k=3)
+    
+    assert alice_hits[0]["company"] == "Quantum Widgets"
+    assert all(hit["person"] != RESUME_DATABASE[0]["basics"]["name"] for hit in alice_hits), "Replaced person should be hidden"
+    assert all(hit["company"] != "Quantum Widgets" for hit in bob_hits), "Other tenants must not see the update"
+    assert store.index("bob", base_index, embedder) is base_index, "Unchanged tenants should share the base index"
+    
+    for i in range(10):
+        store.replace_resume(f"tenant-{i}", 0, replacement)
+        store.index(f"tenant-{i}", base_index, embedder)
+    stats = store.stats()
+    assert stats["cached_indexes"] == 2 and stats["index_evictions"] >= 9, f"LRU should stay bounded: {stats}"
+    assert store.version("alice") and store.version("bob") == 0, "Only changed tenants leave the base database"
+    
+    # A tenant recreated after eviction never gets a version that keyed another dataset's cached results
+    small = TenantStore(RESUME_DATABASE, max_tenants=1)
+    first = small.replace_resume("dave", 0, replacement)
+    small.replace_resume("erin", 0, replacement)
+    assert small.version("dave") == 0, "dave should have been evicted"
+    assert small.replace_resume("dave", 1, replacement) != first
+    
+    # With dedup, another person's copy of a replaced person's entry must not keep it visible
+    database = copy.deepcopy(RESUME_DATABASE)
+    database[1]["work"].append(copy.deepcopy(database[0]["work"][0]))
+    deduped = ExperienceIndex.build(database, embedder, dedup=True)
+    dedup_store = TenantStore(database)
+    dedup_store.replace_resume("carol", 0, replacement)
+    company = database[0]["work"][0]["name"]
+    hits = dedup_store.index("carol", deduped, embedder).search(embedder.encode([company])[0], top_k=len(deduped))
+    assert all(hit["person"] != database[0]["basics"]["name"] for hit in hits)
+    assert any(hit["company"] == company and hit["person"] == database[1]["basics"]["name"] for hit in hits)
+    
+    print(f"✅ Tenant isolation works: {stats}")
+
+def test_resume_store():
+    """Test the SQLite resume store and its lazily fetched index"""
+    print("\n🧪 Testing resume store...")
+    
+    embedder = HashingEmbedder()
+    query = embedder.encode(["Kubernetes clusters AWS infrastructure"])[0]
+    memory_hits = ExperienceIndex.build(RESUME_DATABASE, embedder, highlights=True).search(query, 3, highlights_per_row=2)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = migrate(os.path.join(tmp, "resumes.db"))
+        assert len(store) == len(RESUME_DATABASE)
+        assert store.get_many([2, 0, 2]) == [RESUME_DATABASE[2], RESUME_DATABASE[0], RESUME_DATABASE[2]]
+        
+        index = build_store_index(store, embedder, highlights=True, cache_key="hashing")
+        assert index.search(query, 3, highlights_per_row=2) == memory_hits, "Store-backed search should match in-memory search"
+        
+        cached = build_store_index(store, embedder, highlights=True, cache_key="hashing")
+        assert isinstance(cached.embeddings, np.memmap), "Embeddings should be memory-mapped from the cache"
+        
+        tenants = TenantStore(store)
+        replacement = {"basics": {"name": "Tenant Candidate"}, "work": []}
+        tenants.replace_resume("alice", 0, replacement)
+        hits = tenants.index("alice", cached, embedder).search(query, top_k=10)
+        assert all(hit["person"] != RESUME_DATABASE[0]["basics"]["name"] for hit in hits)
+    
+    print("✅ Resume store works")
+
+def test_single_flight():
+    """Test coalescing of identical in-flight calls"""
+    print("\n🧪 Testing single-flight coalescing...")
+    
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+    
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return {"value": value}
+    
+    threads = [threading.Thread(target=lambda: results.append(flight.do("job", slow, 1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert calls == [1], "Only the leader should compute"
+    assert sum(shared for _, shared in results) == 7
+    assert flight.stats() == {"leaders": 1, "coalesced": 7, "in_flight": 0}
+    
+    # A cancelled leader hands over to a waiter instead of failing it
+    started = threading.Event()
+    def cancelled():
+        started.set()
+        time.sleep(0.05)
+        raise KeyboardInterrupt
+    outcome = []
+    def lead():
+        try:
+            flight.do("cancel", cancelled)
+        except KeyboardInterrupt:
+            outcome.append("leader cancelled")
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    outcome.append(flight.do("cancel", lambda: "recomputed"))
+    leader.join()
+    assert outcome == ["leader cancelled", ("recomputed", False)], outcome
+    
+    print(f"✅ Single-flight works: {flight.stats()}")
+
+def test_streaming_export():
+    """Test streaming export in every format"""
+    print("\n🧪 Testing streaming export...")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jsonl_path = os.path.join(tmp_dir, "resumes.jsonl")
+        assert export_resumes(iter(RESUME_DATABASE), jsonl_path, "jsonl") == len(RESUME_DATABASE)
+        with open(jsonl_path) as f:
+            assert [json.loads(line) for line in f] == RESUME_DATABASE
+        
+        json_path = os.path.join(tmp_dir, "resumes.json.gz")
+        export_resumes(iter(RESUME_DATABASE), json_path, "json")
+        with gzip.open(json_path, "rt") as f:
+            assert json.load(f) == RESUME_DATABASE
+        
+        markdown_path = os.path.join(tmp_dir, "resumes.md")
+        export_resumes(iter(RESUME_DATABASE[:2]), markdown_path, "markdown")
+        with open(markdown_path) as f:
+            markdown = f.read()
+        assert format_resume_for_display(RESUME_DATABASE[0]) in markdown
+        assert format_resume_for_display(RESUME_DATABASE[1]) in markdown
+        
+        assert sorted(os.listdir(tmp_dir)) == ["resumes.json.gz", "resumes.jsonl", "resumes.md"], "Temporary files left behind"
+    
+    print("✅ Streaming export works")
+
+def test_request_profiling():
+    """Test opt-in per-request profiling output"""
+    print("\n🧪 Testing request profiling...")
+    
+    with profiling.profile_request("test", force=False) as profile:
+        assert profile is None, "Profiling should be off by default"
+    
+    assert not profiling.header_requests_profile({"X-Profile": "1"}), "The header should be ignored unless allowed"
+    profiling.PROFILE_ALLOW_HEADER = True
+    try:
+        assert profiling.header_requests_profile({"X-Profile": "1"})
+    finally:
+        profiling.PROFILE_ALLOW_HEADER = False
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiling.PROFILE_DIR = tmp_dir
+        try:
+            with profiling.profile_request("test", force=True) as profile:
+                with profiling.stage("sleep"):
+                    time.sleep(0.05)
+        finally:
+            profiling.PROFILE_DIR = "profiles"
+        
+        assert profile.samples > 0, "Stack sampler should have collected samples"
+        with open(os.path.join(tmp_dir, f"{profile.profile_id}.json")) as f:
+            summary = json.load(f)
+        assert summary["stages_ms"]["sleep"] >= 50
+        with open(os.path.join(tmp_dir, f"{profile.profile_id}.collapsed")) as f:
+            assert any(line.startswith("stage:sleep;") for line in f), "Stacks should be tagged with their stage"
+        assert not profiling.cprofile_active()
+        
+        # cProfile only traces the calling thread, so the pipeline runs its stages there
+        profiling.PROFILE_DIR, profiling.PROFILE_MODE = tmp_dir, "cprofile"
+        try:
+            with profiling.profile_request("traced", force=True) as traced:
+                assert profiling.cprofile_active()
+        finally:
+            profiling.PROFILE_DIR, profiling.PROFILE_MODE = "profiles", "sampler"
+        assert os.path.exists(os.path.join(tmp_dir, f"{traced.profile_id}.prof"))
+        
+        # Only the newest profiles are kept, with all of their files
+        profiling.PROFILE_DIR, profiling.PROFILE_KEEP = tmp_dir, 2
+        try:
+            with profiling.profile_request("newest", force=True) as newest:
+                pass
+        finally:
+            profiling.PROFILE_DIR, profiling.PROFILE_KEEP = "profiles", 100
+        remaining = sorted(os.listdir(tmp_dir))
+        assert {os.path.splitext(name)[0] for name in remaining} == {traced.profile_id, newest.profile_id}, remaining
+        assert len(remaining) == 5, "Kept profiles should keep every file"
+    
+    # A profiled request never joins an identical unprofiled one already in flight
+    import app
+    
+    run_pipeline = app._run_pipeline
+    release = threading.Event()
+    calls = []
+    
+    def gated(job_description, progress, profile, tenant_id):
+        calls.append(profile)
+        if not profile:
+            release.wait(10)
+        return run_pipeline(job_description, progress, profile, tenant_id)
+    
+    with offline_app(app), tempfile.TemporaryDirectory() as tmp_dir:
+        app._run_pipeline, profiling.PROFILE_DIR = gated, tmp_dir
+        leader = threading.Thread(target=app.build_tailored_resume, args=(app.EXAMPLE_JOBS[0],), kwargs={"record_query": False})
+        try:
+            leader.start()
+            while not calls:
+                time.sleep(0.01)
+            resume = app.build_tailored_resume(app.EXAMPLE_JOBS[0], profile=True, record_query=False)
+            assert calls == [False, True] and resume["work"], "The profiled request should run its own pipeline"
+            assert any(name.endswith(".json") for name in os.listdir(tmp_dir)), "The profiled request should write a profile"
+        finally:
+            release.set()
+            leader.join()
+            app._run_pipeline, profiling.PROFILE_DIR = run_pipeline, "profiles"
+    
+    print("✅ Request profiling works")
+
+def test_load_harness():
+    """Test load generation and percentile reporting"""
+    print("\n🧪 Testing load harness...")
+    
+    def target(job_description):
+        if "fail" in job_description:
+            raise RuntimeError("boom")
+        return {"encode": 1.0, "generate": 2.0}
+    
+    summary = summarize(run_load(target, ["job a", "job b", "fail"], concurrency=2, requests=30))
+    
+    assert summary["requests"] == 30
+    assert summary["errors"] == 10
+    assert summary["stages_ms"]["generate"]["p99"] == 2.0
+    assert summary["latency_ms"]["p50"] <= summary["latency_ms"]["p99"]
+    
+    # Closed loop with a duration: at most `concurrency` requests in flight, none left queued at the deadline
+    in_flight, peak = [0], [0]
+    flight_lock = threading.Lock()
+    
+    def slow_target(job_description):
+        with flight_lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with flight_lock:
+            in_flight[0] -= 1
+        return {}
+    
+    run = run_load(slow_target, ["job a"], concurrency=2, duration=0.3)
+    assert peak[0] <= 2, f"Closed-loop clients should wait for their previous request: {peak[0]} in flight"
+    assert 0 < len(run["results"]) <= 2 * (0.3 / 0.01 + 1), f"{len(run['results'])} requests ran after the deadline"
+    
+    print(f"✅ Load harness works: {summary['throughput_rps']} req/s")
+
+def test_model_backends():
+    """Test backend selection from env and config file, and load reports"""
+    print("\n🧪 Testing model backends...")
+    
+    saved = {key: os.environ.pop(key, None) for key in
+             ("MODEL_CONFIG", "EMBEDDING_BACKEND", "GENERATOR_BACKEND", "GENERATOR_OPTIONS")}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "models.json")
+            with open(config_path, "w") as f:
+                json.dump({"embedding": {"backend": "hashing", "dim": 32},
+                           "generator": {"backend": "distilgpt2"}}, f)
+            os.environ["MODEL_CONFIG"] = config_path
+            os.environ["GENERATOR_BACKEND"] = "template"
+            
+            assert resolve_config("embedding") == ("hashing", {"dim": 32})
+            assert resolve_config("generator")[0] == "template", "Env should override the config file"
+            
+            embedder, report = load_backend("embedding")
+            assert embedder.encode(["python flask"]).shape == (1, 32)
+            assert report["backend"] == "hashing" and report["load_seconds"] >= 0
+            assert report["model"] is None, "Backends without weights have no model id"
+            
+            # Reports name the model actually loaded, the backend's default unless configured
+            register_embedding_backend("test-default", default_model="org/default-model")(lambda options: options)
+            try:
+                options, report = load_backend("embedding", "test-default")
+                assert options["model"] == report["model"] == "org/default-model"
+                options, report = load_backend("embedding", "test-default", {"model": "./local-model"})
+                assert options["model"] == report["model"] == "./local-model"
+            finally:
+                del EMBEDDING_BACKENDS["test-default"]
+            
+            generator, _ = load_backend("generator")
+            prompt = "Professional summary... Key requirements: Python, Docker. Summary:"
+            assert "Python, Docker" in generator(prompt)[0]["generated_text"]
+            
+            try:
+                load_backend("generator", "gpt5")
+                assert False, "Unknown backends should be rejected"
+            except ValueError:
+                pass
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+    
+    print(f"✅ Model backends work: {report}")
+
+def test_summary_stopping():
+    """Test first-sentence stopping criteria and greedy decoding arguments"""
+    print("\n🧪 Testing summary early stopping...")
+    import torch
+    
+    class WordTokenizer:
+        vocab = ["Experienced", "engineer", ".", "Skilled", "in", "Python"]
+        
+        def __len__(self):
+            return len(self.vocab)
+        
+        def decode(self, ids):
+            return " ".join(self.vocab[i] for i in ids)
+        
+        def __call__(self, text):
+            return {"input_ids": [self.vocab.index(word) for word in text.split()]}
+    
+    class Generator:
+        tokenizer = WordTokenizer()
+    
+    generator = Generator()
+    stopping = first_sentence_stopping(generator)
+    assert stopping is first_sentence_stopping(generator), "Criteria should be built once per tokenizer"
+    
+    scores = torch.zeros(2, len(generator.tokenizer))
+    done = stopping[0](torch.tensor([[0, 1], [0, 2]]), scores)
+    assert done.tolist() == [False, True], "Only sequences ending a sentence should stop"
+    
+    # A model with a padded embedding matrix can emit ids past the tokenizer's vocabulary
+    padded = Generator()
+    padded.model = type("Model", (), {"config": type("Config", (), {"vocab_size": 8})()})()
+    assert first_sentence_stopping(padded)[0](torch.tensor([[2, 7]]), scores).tolist() == [False]
+    
+    # Criteria are freed with their generator (idle unloading in low-memory mode)
+    import backends
+    cached = len(backends._sentence_stops)
+    del padded
+    gc.collect()
+    assert len(backends._sentence_stops) == cached - 1
+    
+    kwargs = summary_generation_kwargs(generator, early_stop=True, decoding="greedy")
+    assert kwargs["stopping_criteria"] is stopping and kwargs["do_sample"] is False
+    assert summary_generation_kwargs(generator, early_stop=False) == {}
+    assert summary_generation_kwargs(HashingEmbedder(), early_stop=True) == {}, "No tokenizer, no stopping"
+    assert count_new_tokens(generator, "Experienced", "Experienced engineer .") == 2
+    
+    print(f"✅ Summary stopping works: {kwargs}")
+
+def test_embedding_batching():
+    """Test length-bucketed batches and chunk pooling of long texts"""
+    print("\n🧪 Testing bucketed embedding...")
+    
+    model = HashingEmbedder(dim=64)
+    assert BucketedEncoder(model).max_tokens is None, "Models without a sequence limit are never chunked"
+    
+    encoder = BucketedEncoder(model, max_tokens=6, batch_tokens=12, overlap=2)
+    long_text = " ".join(f"word{i}" for i in range(20))
+    texts = ["python flask", long_text, "docker kubernetes aws", "react"]
+    
+    chunks, owners, lengths = encoder.chunk(texts)
+    assert max(lengths) <= 6 and owners.count(1) > 1, "Long text should be split into windows"
+    assert chunks[owners.index(1)].startswith("word0") and chunks[len(owners) - 1 - owners[::-1].index(1)].endswith("word19")
+    
+    for batch in encoder.batches(lengths):
+        assert len(batch) * max(lengths[p] for p in batch) <= 12 or len(batch) == 1, "Batches stay under the token budget"
+    
+    vectors = encoder.encode(texts)
+    assert vectors.shape == (4, 64)
+    assert np.allclose(vectors[[0, 2, 3]], model.encode([texts[0], texts[2], texts[3]])), "Short texts are unchanged"
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0), "Pooled vectors stay normalized"
+    assert all(vectors[1] @ model.encode([chunk])[0] > 0 for chunk, owner in zip(chunks, owners) if owner == 1)
+    assert encoder.stats["chunked_texts"] == 1 and encoder.stats["texts"] == 4
+    
+    print(f"✅ Bucketed embedding works: {encoder.stats}")
+
+def test_stage_graph():
+    """Test concurrent stage execution and critical path tracking"""
+    print("\n🧪 Testing stage graph...")
+    
+    def build(retrieve, summarize):
+        graph = StageGraph()
+        graph.add("retrieve", retrieve, uses_torch=True)
+        graph.add("analyze", lambda: "requirements")
+        graph.add("summarize", summarize, deps=["analyze"], uses_torch=True)
+        graph.add("assemble", lambda experiences, summary: (experiences, summary), deps=["retrieve", "summarize"])
+        return graph
+    
+    def overlapping(timeline, a, b):
+        return timeline[a]["start_ms"] < timeline[b]["end_ms"] and timeline[b]["start_ms"] < timeline[a]["end_ms"]
+    
+    # Both torch stages must be inside their slots at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=10)
+    
+    def meet(name):
+        def run(*deps):
+            with profiling.stage(name):
+                barrier.wait()
+            return name
+        return run
+    
+    with profiling.collect_stages() as recorder:
+        run = build(meet("encode"), meet("generate")).run(StageExecutor(max_workers=4, torch_slots=2))
+    
+    assert run.results["assemble"] == ("encode", "generate")
+    assert overlapping(run.timeline, "retrieve", "summarize"), f"Independent stages should overlap: {run.timeline}"
+    assert set(recorder.stages) == {"encode", "generate"}, "Stages on pool threads should be recorded"
+    last = max(("retrieve", "summarize"), key=lambda name: run.timeline[name]["end_ms"])
+    expected_path = ["retrieve"] if last == "retrieve" else ["analyze", "summarize"]
+    assert run.critical_path == expected_path + ["assemble"], "The critical path should follow the last-finishing dependency"
+    
+    # A single torch slot serializes the torch stages
+    sequential = build(lambda: "encode", lambda requirements: "generate").run(StageExecutor(max_workers=4, torch_slots=1))
+    assert sequential.results["assemble"] == ("encode", "generate")
+    assert not overlapping(sequential.timeline, "retrieve", "summarize"), f"Torch stages should not overlap: {sequential.timeline}"
+    
+    # Slots follow the process's torch thread budget and are recreated after fork
+    assert [default_torch_slots(budget) for budget in (1, 2, 16)] == [1, 2, 2]
+    executor = StageExecutor(max_workers=2, torch_slots=1)
+    pool, _ = executor._ensure_started()
+    executor._pid = -1  # as seen from a forked child
+    assert executor._ensure_started()[0] is not pool
+    
+    failing = StageGraph().add("boom", lambda: 1 / 0)
+    try:
+        failing.run(StageExecutor())
+        assert False, "Stage failures should reach the caller"
+    except ZeroDivisionError:
+        pass
+    
+    print(f"✅ Stage graph works: {run.elapsed_ms:.0f} ms, parallelism {run.parallelism:.2f}, "
+          f"critical path {' -> '.join(run.critical_path)}")
+
+def test_query_log_and_warming():
+    """Test the rolling query log, LRU caches and budgeted cache warming"""
+    print("\n🧪 Testing query log and cache warming...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "query_log.json")
+        log = QueryLog(path, decay_every=100, flush_every=1000)
+        for _ in range(3):
+            log.record("Senior  Python Developer")
+        log.record("senior python developer")
+        log.record("DevOps Engineer")
+        log.flush()
+        
+        reloaded = QueryLog(path)
+        assert reloaded.top(1) == ["Senior  Python Developer"], "Queries should be counted after normalization"
+        assert len(reloaded) == 2
+        
+        for _ in range(95):
+            log.record("Data Scientist")
+        assert "DevOps Engineer" not in log.top(10), "Counts of 1 should decay away"
+        
+        # Forked workers sharing one path merge their counts instead of overwriting them
+        shared = os.path.join(tmp, "shared.json")
+        QueryLog(shared).record("warm me")  # recorded but never flushed
+        children = []
+        for worker in range(2):
+            pid = os.fork()
+            if pid == 0:
+                worker_log = QueryLog(shared, flush_every=10)
+                for _ in range(25):
+                    worker_log.record(f"Worker {worker} job")
+                    worker_log.record("Shared job")
+                worker_log.flush()
+                os._exit(0)
+            children.append(pid)
+        for pid in children:
+            assert os.waitpid(pid, 0)[1] == 0
+        with open(shared) as f:
+            counts = {key: count for key, (count, _) in json.load(f)["queries"].items()}
+        assert counts == {"shared job": 50, "worker 0 job": 25, "worker 1 job": 25}, counts
+    
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1, "Least recently used entry should be evicted"
+    
+    # Record every busy poll and warm call so ordering is checked, not durations
+    events = []
+    first_poll = []
+    
+    def is_busy():
+        first_poll.append(time.monotonic())
+        busy = len(first_poll) <= 3
+        events.append(("busy", busy))
+        return busy
+    
+    def warm(job):
+        events.append(("warm", job))
+        if job == "b":
+            # The warmer started before its first poll, so this runs past its deadline
+            while time.monotonic() < first_poll[0] + 1.0:
+                time.sleep(0.01)
+    
+    stats = CacheWarmer(warm, ["a", "b", "c", "d", "e"], budget_seconds=1.0, duty_cycle=0.5, is_busy=is_busy).run()
+    
+    assert events[:4] == [("busy", True)] * 3 + [("busy", False)], f"Warming should wait for live traffic: {events}"
+    assert [job for kind, job in events if kind == "warm"] == ["a", "b"], f"Warming should stop at the budget: {events}"
+    assert stats["warmed"] == 2 and stats["done"], stats
+    
+    print(f"✅ Query log and cache warming work: {stats}")
+
+def test_idle_unload():
+    """Test that an idle generator is unloaded and reloaded by the next request"""
+    print("\n🧪 Testing idle generator unloading...")
+    
+    # Imported here: app pulls in Gradio and torch
+    import app
+    
+    saved = (app.LOW_MEMORY_MODE, app.GENERATOR_IDLE_SECONDS)
+    with offline_app(app):
+        app.LOW_MEMORY_MODE, app.GENERATOR_IDLE_SECONDS = True, 0.2
+        try:
+            _, generator = app.load_models()
+            assert app._idle_reaper is not None and app._idle_reaper.is_alive(), "Low-memory mode should start the reaper"
+            generator_ref = weakref.ref(generator)
+            del generator
+            
+            deadline = time.monotonic() + 30
+            while app._models_cache[1] is not None and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert app._models_cache[1] is None, "The reaper should unload the idle generator"
+            assert generator_ref() is None, "Nothing should keep the unloaded generator alive"
+            embedding_model = app._models_cache[0]
+            
+            # Stop the reaper from unloading again before the reload is checked
+            app.GENERATOR_IDLE_SECONDS = 300
+            resume = app.build_tailored_resume(app.EXAMPLE_JOBS[0], record_query=False)
+            assert resume["work"] and resume["basics"]["summary"]
+            assert app._models_cache[1] is not None, "The next request should reload the generator"
+            assert app._models_cache[0] is embedding_model, "Only the generator should be reloaded"
+        finally:
+            app.LOW_MEMORY_MODE, app.GENERATOR_IDLE_SECONDS = saved
+    
+    print("✅ Idle generator unloading works")
+
+def test_server():
+    """Test the JSON API and the pre-fork worker lifecycle on the offline backends"""
+    print("\n🧪 Testing multi-worker server...")
+    
+    # Imported here: app pulls in Gradio and torch
+    import app
+    import server
+    
+    def request(url, body=None):
+        data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode("utf-8"))
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=60) as response:
+                return response.status, dict(response.headers), json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), json.loads(e.read())
+    
+    with offline_app(app):
+        httpd = HTTPServer(("127.0.0.1", 0), server.ResumeRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+            status, _, body = request(f"{base_url}/health")
+            assert status == 200 and body == {"status": "ok", "pid": os.getpid()}
+            assert request(f"{base_url}/missing")[0] == 404
+            assert request(f"{base_url}/missing", {})[0] == 404
+            assert request(f"{base_url}/generate", b"not json")[0] == 400
+            assert request(f"{base_url}/generate", {"job_description": "  "})[0] == 400
+            
+            status, headers, resume = request(f"{base_url}/generate", {"job_description": app.EXAMPLE_JOBS[0]})
+            assert status == 200 and resume["work"], "A resume with work experience should come back"
+            stages = [timing.split(";")[0] for timing in headers["Server-Timing"].split(", ")]
+            assert {"encode", "search", "generate"} <= set(stages) and all(";dur=" in t for t in headers["Server-Timing"].split(", "))
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+    
+    # Master + two forked workers: a killed worker is replaced, SIGTERM stops
+    # everything and the workers flush the query log on the way out
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = server.create_listener("127.0.0.1", 0)
+        port = probe.getsockname()[1]
+        probe.close()
+        env = {**os.environ, **OFFLINE_BACKENDS, "WARM_ON_STARTUP": "0", "QUERY_LOG_PATH": os.path.join(tmp, "query_log.json")}
+        master = subprocess.Popen([sys.executable, server.__file__, "--host", "127.0.0.1", "--port", str(port),
+                                   "--workers", "2", "--threads", "1"], env=env, stdout=subprocess.DEVNULL)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            assert server._wait_for_health(f"{base_url}/health", timeout=120)["pid"] != master.pid
+            workers = set(server._child_pids(master.pid))
+            assert len(workers) == 2, workers
+            
+            killed = workers.pop()
+            os.kill(killed, signal.SIGKILL)
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline:
+                replaced = set(server._child_pids(master.pid))
+                if len(replaced) == 2 and killed not in replaced:
+                    break
+                time.sleep(0.1)
+            assert len(replaced) == 2 and killed not in replaced and workers <= replaced, "Dead workers should be restarted"
+            status, _, resume = request(f"{base_url}/generate", {"job_description": app.EXAMPLE_JOBS[1]})
+            assert status == 200 and resume["work"]
+            
+            master.send_signal(signal.SIGTERM)
+            assert master.wait(timeout=60) == 0
+            assert not any(os.path.exists(f"/proc/{pid}") for pid in replaced), "Workers should exit with the master"
+        finally:
+            if master.poll() is None:
+                master.kill()
+                master.wait()
+        
+        assert QueryLog(env["QUERY_LOG_PATH"]).top(5) == [app.EXAMPLE_JOBS[1]], "Workers should flush the query log on SIGTERM"
+    
+    print("✅ Multi-worker server works")
+
 def main():
     """Run all tests"""
     print("🚀 Running Deep Job Seek Mini tests...\n")
@@ -96,6 +955,25 @@ def main():
         test_resume_data()
         test_key_extraction()
         test_resume_building()
+        test_memory_report()
+        test_experience_index()
+        test_highlight_selection()
+        test_requirement_filters()
+        test_compressed_index()
+        test_near_duplicate_detection()
+        test_tenant_isolation()
+        test_resume_store()
+        test_single_flight()
+        test_streaming_export()
+        test_request_profiling()
+        test_load_harness()
+        test_model_backends()
+        test_summary_stopping()
+        test_embedding_batching()
+        test_stage_graph()
+        test_query_log_and_warming()
+        test_idle_unload()
+        test_server()
         
         print("\n🎉 All tests passed! The app should work correctly.")
         
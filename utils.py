@@ -5,41 +5,41 @@ Utility functions for Deep Job Seek Mini
 import re
 import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+# Common technical keywords to look for
+TECH_KEYWORDS = [
+    # Programming Languages
+    'python', 'javascript', 'java', 'typescript', 'go', 'rust', 'c++', 'c#', 'php', 'ruby',
+    
+    # Frameworks & Libraries
+    'react', 'angular', 'vue', 'flask', 'django', 'fastapi', 'express', 'spring', 'laravel',
+    
+    # Databases
+    'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch', 'qdrant', 'pinecone',
+    
+    # Cloud & Infrastructure  
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'jenkins', 'gitlab',
+    
+    # Tools & Technologies
+    'git', 'linux', 'api', 'rest', 'graphql', 'microservices', 'ci/cd', 'devops',
+    
+    # Data & AI
+    'machine learning', 'data science', 'tensorflow', 'pytorch', 'pandas', 'numpy',
+    
+    # Other
+    'agile', 'scrum', 'testing', 'security', 'performance', 'monitoring'
+]
 
 def extract_key_requirements(job_description: str) -> List[str]:
     """Extract key requirements and skills from job description"""
     
-    # Common technical keywords to look for
-    tech_keywords = [
-        # Programming Languages
-        'python', 'javascript', 'java', 'typescript', 'go', 'rust', 'c++', 'c#', 'php', 'ruby',
-        
-        # Frameworks & Libraries
-        'react', 'angular', 'vue', 'flask', 'django', 'fastapi', 'express', 'spring', 'laravel',
-        
-        # Databases
-        'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch', 'qdrant', 'pinecone',
-        
-        # Cloud & Infrastructure  
-        'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'jenkins', 'gitlab',
-        
-        # Tools & Technologies
-        'git', 'linux', 'api', 'rest', 'graphql', 'microservices', 'ci/cd', 'devops',
-        
-        # Data & AI
-        'machine learning', 'data science', 'tensorflow', 'pytorch', 'pandas', 'numpy',
-        
-        # Other
-        'agile', 'scrum', 'testing', 'security', 'performance', 'monitoring'
-    ]
-    
     # Convert to lowercase for matching
     job_lower = job_description.lower()
     
     # Find matching keywords
     found_keywords = []
-    for keyword in tech_keywords:
+    for keyword in TECH_KEYWORDS:
         if keyword in job_lower:
             found_keywords.append(keyword.title())
     
@@ -74,6 +74,11 @@ def extract_key_requirements(job_description: str) -> List[str]:
     
     return list(set(found_keywords))[:10]  # Return unique keywords, max 10
 
+def normalize_job_description(job_description: str) -> str:
+    """Normalize a job description for use as a coalescing or cache key"""
+    
+    return " ".join(job_description.lower().split())
+
 def build_resume_json(basics: Dict, work_experiences: List[Dict], skills: List[str], projects: List[Dict] = None) -> Dict[str, Any]:
     """Build a complete JSON Resume schema compliant resume"""
     
@@ -127,53 +132,54 @@ def calculate_relevance_score(job_requirements: List[str], candidate_skills: Lis
     # Calculate percentage
     return min(matches / len(job_requirements), 1.0)
 
-def format_resume_for_display(resume: Dict[str, Any]) -> str:
-    """Format resume for readable display"""
-    
-    output = []
+def iter_resume_markdown(resume: Dict[str, Any]) -> Iterator[str]:
+    """Yield the Markdown rendering of a resume line by line"""
     
     # Basics
     basics = resume.get("basics", {})
-    output.append(f"# {basics.get('name', 'N/A')}")
-    output.append(f"📧 {basics.get('email', 'N/A')} | 📞 {basics.get('phone', 'N/A')}")
-    output.append(f"\n**Summary:** {basics.get('summary', 'N/A')}")
+    yield f"# {basics.get('name', 'N/A')}"
+    yield f"📧 {basics.get('email', 'N/A')} | 📞 {basics.get('phone', 'N/A')}"
+    yield f"\n**Summary:** {basics.get('summary', 'N/A')}"
     
     # Work Experience
     work = resume.get("work", [])
     if work:
-        output.append("\n## 💼 Work Experience")
+        yield "\n## 💼 Work Experience"
         for job in work:
-            output.append(f"\n### {job.get('position', 'N/A')} at {job.get('name', 'N/A')}")
-            output.append(f"*{job.get('startDate', 'N/A')} - {job.get('endDate', 'Present')}*")
-            output.append(f"\n{job.get('summary', 'N/A')}")
+            yield f"\n### {job.get('position', 'N/A')} at {job.get('name', 'N/A')}"
+            yield f"*{job.get('startDate', 'N/A')} - {job.get('endDate', 'Present')}*"
+            yield f"\n{job.get('summary', 'N/A')}"
             
             highlights = job.get('highlights', [])
             if highlights:
-                output.append("\n**Key Achievements:**")
+                yield "\n**Key Achievements:**"
                 for highlight in highlights:
-                    output.append(f"• {highlight}")
+                    yield f"• {highlight}"
     
     # Skills
     skills = resume.get("skills", [])
     if skills:
-        output.append("\n## 🛠️ Skills")
+        yield "\n## 🛠️ Skills"
         skill_names = [skill.get('name', skill) if isinstance(skill, dict) else skill for skill in skills]
-        output.append(", ".join(skill_names))
+        yield ", ".join(skill_names)
     
     # Projects
     projects = resume.get("projects", [])
     if projects:
-        output.append("\n## 🚀 Projects")
+        yield "\n## 🚀 Projects"
         for project in projects:
-            output.append(f"\n### {project.get('name', 'N/A')}")
-            output.append(f"{project.get('description', 'N/A')}")
+            yield f"\n### {project.get('name', 'N/A')}"
+            yield f"{project.get('description', 'N/A')}"
             
             highlights = project.get('highlights', [])
             if highlights:
                 for highlight in highlights:
-                    output.append(f"• {highlight}")
+                    yield f"• {highlight}"
+
+def format_resume_for_display(resume: Dict[str, Any]) -> str:
+    """Format resume for readable display"""
     
-    return "\n".join(output)
+    return "\n".join(iter_resume_markdown(resume))
 
 def validate_json_resume(resume: Dict[str, Any]) -> bool:
     """Validate if resume follows JSON Resume schema with essential fields"""